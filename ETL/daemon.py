@@ -0,0 +1,254 @@
+# Import dependencies
+from socketserver import ThreadingUnixStreamServer, StreamRequestHandler
+from threading import Thread, Event, Lock
+from queue import Queue, Empty
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+import socket
+import signal
+import json
+import time
+import os
+
+# Allow logging from top-level
+import logging
+log = logging.getLogger(__name__)
+
+# Custom libraries
+from ETL.runner import TaskRunner
+from ETL.etl_bin.cron import CronSchedule
+
+
+def send(socket_path: Path | str, cmd: str, timeout: float = 10.0, **kwargs: Any) -> dict[str, Any]:
+    '''Sends one command to a running daemon and returns its reply.
+
+    :param socket_path: Control socket of the daemon.
+    :type socket_path: Path | str
+    :param cmd: `run` (with `name`, optionally `force` and `from_stage`), `status` or `stop`.
+    :type cmd: str
+    :param timeout: Seconds to wait for the reply. Defaults to 10.
+    :type timeout: float
+
+    :raises ConnectionError: When the other end closes without a reply or answers with something other than a JSON object.
+
+    :returns: The daemon's JSON reply, always holding `ok`.
+    :rtype: dict[str, Any]
+    '''
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(str(socket_path))
+        s.sendall((json.dumps({'cmd': cmd, **kwargs}) + '\n').encode())
+        with s.makefile('r') as f:
+            line = f.readline()
+    try:
+        reply = json.loads(line)
+    except ValueError:
+        reply = None
+    if not isinstance(reply, dict):
+        raise ConnectionError(f'No valid reply on {socket_path}: {line[:200]!r}')
+    return reply
+
+
+class _ControlHandler(StreamRequestHandler):
+    # One JSON request line in, one JSON reply line out. Malformed requests get an error reply, nothing a client
+    # sends or fails to read may raise in the server thread
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line.strip():
+            # Connected and closed again without a request, e.g. a port probe
+            return None
+        try:
+            req = json.loads(line)
+            if not isinstance(req, dict):
+                raise ValueError(f'Control request must be a JSON object, got {type(req).__name__}.')
+            reply = self.server.etl.command(req)
+        except (ValueError, KeyError) as e:
+            log.warning('Bad control request: %r', e)
+            reply = {'ok': False, 'error': repr(e)}
+        except Exception as e:
+            log.exception('Control request failed.')
+            reply = {'ok': False, 'error': repr(e)}
+        try:
+            self.wfile.write((json.dumps(reply, default = str) + '\n').encode())
+        except OSError as e:
+            log.warning('Control client went away before the reply: %r', e)
+        return None
+
+
+class EtlDaemon:
+    '''Long-lived ETL process. The pipeline.yml and `Settings` are loaded once, and the DB engine pool, imported
+    component modules and loaded models stay warm between runs. Tasks run one at a time on the main thread,
+    queued by the `schedules` section of the pipeline.yml or by `run` requests on a Unix control socket.
+    A task that is already queued is not queued twice. Changes to the pipeline.yml need a restart.
+
+    :param runner: Runner holding the parsed pipeline.yml, reused for every run.
+    :type runner: TaskRunner
+    :param socket_path: Path of the control socket, created with owner-only permissions.
+    :type socket_path: Path
+    '''
+    def __init__(self, runner: TaskRunner, socket_path: Path):
+        self.runner = runner
+        self.socket_path = Path(socket_path)
+        self.schedules = {name: (sched, CronSchedule(sched.cron)) for name, sched in runner.etl_cfg.schedules.items()}
+        self.started = datetime.now()
+        self.runs = 0
+        self._queue: Queue[tuple[str, dict[str, Any], str]] = Queue()
+        self._queued: list[str] = []
+        self._current: dict[str, Any] | None = None
+        self._last: dict[str, dict[str, Any]] = {}
+        self._next: dict[str, datetime] = {}
+        self._lock = Lock()
+        self._stop = Event()
+        self._server: ThreadingUnixStreamServer | None = None
+
+    def submit(self, name: str, source: str, **kwargs: Any) -> bool:
+        '''Queues a task or pipeline run.
+
+        :returns: False when the same name is already waiting in the queue.
+        :rtype: bool
+        '''
+        if name not in self.runner.etl_cfg.tasks and name not in self.runner.etl_cfg.pipelines:
+            raise ValueError(f'{name} task or pipeline name could not be found.')
+        with self._lock:
+            if name in self._queued:
+                return False
+            self._queued.append(name)
+        self._queue.put((name, kwargs, source))
+        log.info('Queued %s (%s).', name, source)
+        return True
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'pid':      os.getpid(),
+                'started':  self.started.isoformat(),
+                'runs':     self.runs,
+                'current':  self._current,
+                'queued':   list(self._queued),
+                'next':     {name: at.isoformat() for name, at in self._next.items()},
+                'last':     dict(self._last),
+            }
+
+    def stop(self) -> None:
+        '''Stops accepting work, the current run finishes first.'''
+        log.info('Daemon stop requested.')
+        self._stop.set()
+        return None
+
+    def command(self, req: dict[str, Any]) -> dict[str, Any]:
+        cmd = req.get('cmd')
+        if cmd == 'run':
+            queued = self.submit(req['name'], 'control socket', force = bool(req.get('force', False)), from_stage = req.get('from_stage'))
+            return {'ok': True, 'name': req['name'], 'queued': queued}
+        if cmd == 'status':
+            return {'ok': True, **self.status()}
+        if cmd == 'stop':
+            self.stop()
+            return {'ok': True}
+        return {'ok': False, 'error': f'Unknown command {cmd!r}, expected run, status or stop.'}
+
+    def _scheduler(self) -> None:
+        with self._lock:
+            now = datetime.now()
+            self._next = {name: cron.next_after(now) for name, (_, cron) in self.schedules.items()}
+        while self._next:
+            # Wakes up at least once a minute, so clock changes and suspends cannot push a run back by hours
+            wait = (min(self._next.values()) - datetime.now()).total_seconds()
+            if self._stop.wait(min(max(wait, 0), 60)):
+                return None
+            now = datetime.now()
+            for name, (sched, cron) in self.schedules.items():
+                if self._next[name] > now:
+                    continue
+                if not self.submit(sched.task, f'schedule {name}', force = sched.force):
+                    log.warning('Schedule %s skipped, %s is still queued from an earlier trigger.', name, sched.task)
+                with self._lock:
+                    self._next[name] = cron.next_after(now)
+        return None
+
+    def _run(self, name: str, kwargs: dict[str, Any], source: str) -> None:
+        started = datetime.now()
+        with self._lock:
+            self._queued.remove(name)
+            self._current = {'name': name, 'source': source, 'started': started.isoformat()}
+        log.info('Daemon run of %s started (%s).', name, source)
+
+        t = time.perf_counter()
+        status, error = 'ok', None
+        try:
+            self.runner.run(name, **kwargs)
+        except Exception as e:
+            # Already logged with its traceback by the runner, the daemon carries on with the next run
+            status, error = 'failed', repr(e)
+        finally:
+            report = self.runner.report
+            if report is not None and report.records:
+                log.info('Run summary:\n%s', report.summary())
+            with self._lock:
+                self._last[name] = {
+                    'status':   status,
+                    'source':   source,
+                    'started':  started.isoformat(),
+                    'wall_s':   round(time.perf_counter() - t, 2),
+                    'run_id':   report.run_id if report is not None else None,
+                    'error':    error,
+                }
+                self._current = None
+                self.runs += 1
+        log.info('Daemon run of %s %s in %.2fs.', name, 'completed' if status == 'ok' else 'failed', time.perf_counter() - t)
+        return None
+
+    def _bind(self) -> ThreadingUnixStreamServer:
+        # A socket file left behind by a crashed daemon is removed, one still answering means a daemon is running
+        if self.socket_path.exists():
+            try:
+                send(self.socket_path, 'status', timeout = 2)
+            except (OSError, ValueError):
+                # Nothing listening, or something that does not speak the protocol, either way not a live daemon
+                self.socket_path.unlink()
+            else:
+                raise RuntimeError(f'An ETL daemon is already listening on {self.socket_path}.')
+        self.socket_path.parent.mkdir(parents = True, exist_ok = True)
+        server = ThreadingUnixStreamServer(str(self.socket_path), _ControlHandler)
+        os.chmod(self.socket_path, 0o600)
+        server.daemon_threads = True
+        server.etl = self
+        return server
+
+    def serve(self) -> None:
+        '''Runs until a `stop` request, SIGTERM or SIGINT. Component classes of scheduled tasks are imported up front.'''
+        for sched, _ in self.schedules.values():
+            self.runner.warm(sched.task)
+
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: self.stop())
+
+        self._server = self._bind()
+        threads = [
+            Thread(target = self._server.serve_forever, name = 'etl-control', daemon = True),
+            Thread(target = self._scheduler, name = 'etl-scheduler', daemon = True),
+        ]
+        for thread in threads:
+            thread.start()
+        log.info('ETL daemon %d listening on %s with %d schedule(s).', os.getpid(), self.socket_path, len(self.schedules))
+
+        try:
+            while not self._stop.is_set():
+                try:
+                    item = self._queue.get(timeout = 0.5)
+                except Empty:
+                    continue
+                self._run(*item)
+        finally:
+            self._stop.set()
+            self._server.shutdown()
+            self._server.server_close()
+            self.socket_path.unlink(missing_ok = True)
+            log.info('ETL daemon stopped after %d run(s), %d still queued.', self.runs, len(self._queued))
+        return None
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
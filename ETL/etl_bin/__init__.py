@@ -1,9 +1,16 @@
+from .categories import CategorySchema, CATEGORICAL_COLUMNS, concat_chunks
+from .artifacts import ArtifactStore, stage_key
+from .metrics import StageTimer, RunReport
+
 from .etl_abc import BaseExtractor, BaseTransformer, BaseLoader
-from .yaml_stubs import YamlComponents, YamlPipelines, YamlTasks, YamlETL
+from .yaml_stubs import YamlComponents, YamlPipelines, YamlArtifacts, YamlTasks, YamlSchedules, YamlETL
 
 __all__ = [
     'BaseExtractor', 'BaseTransformer', 'BaseLoader',
-    'YamlComponents', 'YamlPipelines', 'YamlTasks', 'YamlETL',
+    'YamlComponents', 'YamlPipelines', 'YamlArtifacts', 'YamlTasks', 'YamlSchedules', 'YamlETL',
+    'CategorySchema', 'CATEGORICAL_COLUMNS', 'concat_chunks',
+    'ArtifactStore', 'stage_key',
+    'StageTimer', 'RunReport',
 ]
 
 
@@ -0,0 +1,150 @@
+# Import dependencies
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from pathlib import Path
+import tempfile
+import hashlib
+import shutil
+import logging
+log = logging.getLogger(__name__)
+
+# Custom libraries
+from core import get_settings
+
+# Only for annotations, spilled frames are read back with a local import
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def stage_key(extractor: str, transformers: list[str]) -> str:
+    '''Name of the frame produced by an extractor followed by a prefix of its transformer chain, e.g. `quick_arrow/new_ml_prep`.'''
+    return '/'.join([extractor, *transformers])
+
+
+class ArtifactStore:
+    '''Task-scoped LRU store for intermediate frames shared between the pipelines of one task.
+    Frames are copied on the way in and out, so a pipeline mutating its input never leaks into the next one.
+    Past the memory budget the least recently used frames are pickled to a scratch directory under `Settings.storage`
+    instead of being dropped, unless spilling is disabled. Storing a frame drops the frames stored further down its
+    chain, they were derived from the one it replaces.
+
+    :param keep: Component names whose output frame is worth keeping, e.g. `new_ml_prep`.
+    :type keep: list[str]
+    :param memory_mb: Budget for frames held in memory, measured with `memory_usage(deep = True)`.
+    :type memory_mb: float
+    :param spill: Spill evicted frames to disk instead of discarding them. Defaults to True.
+    :type spill: bool
+    '''
+    def __init__(self, keep: list[str], memory_mb: float, spill: bool = True):
+        self.keep = set(keep)
+        self.budget = int(memory_mb * 1e6)
+        self.spill = spill
+        self._mem: 'OrderedDict[str, tuple[pd.DataFrame, int]]' = OrderedDict()
+        self._disk: dict[str, Path] = {}
+        self._dir: Path | None = None
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'spills': 0}
+
+    @property
+    def used(self) -> int:
+        return sum(size for _, size in self._mem.values())
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._mem or key in self._disk
+
+    def _spill(self, key: str, df: 'pd.DataFrame') -> None:
+        if self._dir is None:
+            storage = get_settings().storage
+            storage.mkdir(parents = True, exist_ok = True)
+            self._dir = Path(tempfile.mkdtemp(prefix = 'artifacts_', dir = storage))
+        p = self._dir / f'{hashlib.sha1(key.encode()).hexdigest()}.pkl'
+        df.to_pickle(p)
+        self._disk[key] = p
+        self.stats['spills'] += 1
+        log.debug('Spilled artifact %s to %s.', key, p)
+        return None
+
+    def _evict(self) -> None:
+        while self._mem and self.used > self.budget:
+            key, (df, size) = self._mem.popitem(last = False)
+            self.stats['evictions'] += 1
+            log.debug('Evicting artifact %s (%.1f MB).', key, size / 1e6)
+            if self.spill:
+                self._spill(key, df)
+        return None
+
+    def wants(self, extractor: str, transformers: list[str]) -> bool:
+        '''Whether the frame after this stage is one of the named outputs to keep.'''
+        return (transformers[-1] if transformers else extractor) in self.keep
+
+    def put(self, key: str, df: 'pd.DataFrame') -> None:
+        stale = [k for k in [*self._mem, *self._disk] if k.startswith(f'{key}/')]
+        for k in stale:
+            self._mem.pop(k, None)
+            p = self._disk.pop(k, None)
+            if p is not None:
+                p.unlink(missing_ok = True)
+        if stale:
+            log.info('Dropped artifact(s) %s derived from the previous %s.', ', '.join(stale), key)
+        return self._store(key, df)
+
+    def _store(self, key: str, df: 'pd.DataFrame') -> None:
+        size = int(df.memory_usage(deep = True).sum())
+        self._disk.pop(key, None)
+        self._mem.pop(key, None)
+        if size > self.budget and not self.spill:
+            log.info('Artifact %s (%.1f MB) exceeds the store budget, not kept.', key, size / 1e6)
+            return None
+        self._mem[key] = (df.copy(), size)
+        log.info('Stored artifact %s (%.1f MB).', key, size / 1e6)
+        self._evict()
+        return None
+
+    def get(self, key: str) -> 'pd.DataFrame | None':
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            self.stats['hits'] += 1
+            log.info('Artifact hit for %s.', key)
+            return self._mem[key][0].copy()
+        if key in self._disk:
+            # Reading back promotes the frame to memory, the pickle stays until the store is closed
+            import pandas as pd
+            df = pd.read_pickle(self._disk.pop(key))
+            self.stats['disk_hits'] += 1
+            log.info('Artifact hit for %s (from disk).', key)
+            self._store(key, df)
+            return df
+        self.stats['misses'] += 1
+        log.info('Artifact miss for %s.', key)
+        return None
+
+    def lookup(self, extractor: str, transformers: list[str]) -> 'tuple[int, pd.DataFrame | None]':
+        '''Finds the longest stored prefix of a transformer chain, counted as a single hit or miss.
+
+        :returns: Number of transformers already applied to the returned frame, -1 and None when nothing is stored.
+        :rtype: tuple[int, pd.DataFrame | None]
+        '''
+        for i in range(len(transformers), -1, -1):
+            key = stage_key(extractor, transformers[:i])
+            if key in self:
+                return i, self.get(key)
+        self.stats['misses'] += 1
+        log.info('Artifact miss for %s.', stage_key(extractor, transformers))
+        return -1, None
+
+    def close(self) -> None:
+        log.info(
+            'Artifact store closed: %d hits (%d from disk), %d misses, %d evictions, %.1f MB held.',
+            self.stats['hits'] + self.stats['disk_hits'], self.stats['disk_hits'], self.stats['misses'],
+            self.stats['evictions'], self.used / 1e6
+        )
+        self._mem.clear()
+        self._disk.clear()
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors = True)
+            self._dir = None
+        return None
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
@@ -0,0 +1,135 @@
+# Import dependencies
+from contextlib import contextmanager
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+import json
+import os
+import logging
+log = logging.getLogger(__name__)
+
+# Advisory file locks are POSIX only, on Windows saves are still atomic but not merged under a lock
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Custom libraries
+from ETL.etl_bin.storage import dataset_path
+
+# Only for annotations, pandas loads with the first frame that is cast or concatenated
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Low-cardinality text columns carried as pandas Categoricals through the pipeline
+CATEGORICAL_COLUMNS = [
+    'boro',
+    'cuisine',
+    'action',
+    'critical_flag',
+    'inspection_type',
+    'inspection_subtype',
+    'violation_code',
+    'nta',
+]
+
+
+class CategorySchema:
+    '''Stable category vocabularies for the categorical inspection columns, stored as JSON next to the data.
+    New values are appended to the end of a vocabulary, so a value keeps its code across runs. Saves merge with the
+    file under a lock, so extractors and transformers of concurrent pipelines extending the same vocabulary never
+    hand out one code to two values.
+
+    :param name: Dataset name, the vocabulary lives at `Settings.storage/<name>_categories.json`.
+    :type name: str
+    :param columns: Columns declared categorical. Defaults to `CATEGORICAL_COLUMNS`.
+    :type columns: list[str]
+    '''
+    def __init__(self, name: str, columns: list[str] = CATEGORICAL_COLUMNS):
+        self.p = dataset_path(f'{name}_categories', '.json')
+        self.columns = columns
+        self.vocab: dict[str, list[str]] = self._read()
+
+    def _read(self) -> dict[str, list[str]]:
+        if not self.p.is_file():
+            return {}
+        with open(self.p, 'r') as f:
+            return json.load(f)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        # Separate lock file, the vocabulary itself is swapped out by os.replace and a lock on it would go with it
+        if fcntl is None:
+            yield None
+            return None
+        with open(self.p.with_name(f'{self.p.name}.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield None
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return None
+
+    def save(self) -> None:
+        '''Appends the values this instance added to the vocabularies on disk and swaps the file in atomically.
+        Values another process saved in the meantime keep their codes and ours go after them, `vocab` is reloaded
+        with the merged result.'''
+        with self._locked():
+            merged = self._read()
+            for col, values in self.vocab.items():
+                known = merged.setdefault(col, [])
+                seen = set(known)
+                known.extend(v for v in values if v not in seen)
+
+            tmp = self.p.with_name(f'{self.p.name}.{os.getpid()}.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(merged, f, indent = 2)
+            os.replace(tmp, self.p)
+        self.vocab = merged
+        return None
+
+    def apply(self, df: 'pd.DataFrame') -> 'pd.DataFrame':
+        '''Casts the declared columns present in `df` to Categoricals over the stored vocabularies, extending them with unseen values.
+
+        :returns: The same frame with categorical columns converted in place.
+        :rtype: pd.DataFrame
+        '''
+        import pandas as pd
+        cols = [col for col in self.columns if col in df.columns]
+        changed = False
+        for col in cols:
+            known = self.vocab.setdefault(col, [])
+            seen = set(known)
+            new = sorted(str(v) for v in pd.unique(df[col].dropna()) if str(v) not in seen)
+            if new:
+                known.extend(new)
+                changed = True
+
+        # Saved before casting, merging with the file can put values of other processes ahead of ours
+        if changed:
+            log.info('Category vocabularies extended, saving to %s.', self.p)
+            self.save()
+        for col in cols:
+            df[col] = pd.Categorical(df[col], categories = self.vocab[col])
+        return df
+
+def concat_chunks(frames: 'list[pd.DataFrame]') -> 'pd.DataFrame':
+    '''Concatenates streamed chunks without losing categoricals whose vocabularies grew between chunks.
+
+    :param frames: Chunks in stream order, all with the same columns.
+    :type frames: list[pd.DataFrame]
+
+    :returns: One frame, categorical columns unioned instead of falling back to object.
+    :rtype: pd.DataFrame
+    '''
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+    df = pd.concat(frames)
+    for col, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = union_categoricals([f[col] for f in frames])
+    return df
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
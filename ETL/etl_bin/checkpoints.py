@@ -0,0 +1,185 @@
+# Import dependencies
+from datetime import datetime
+from typing import TYPE_CHECKING
+from pathlib import Path
+import hashlib
+import json
+import sys
+import os
+import logging
+log = logging.getLogger(__name__)
+
+# Custom libraries
+from core import get_settings
+
+# Only for annotations, the functions that hash and read frames import pandas themselves
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    import pandas as pd
+
+# Project packages whose source counts towards a component's code version
+PROJECT_PACKAGES = ('ETL', 'ml_lib', 'core', 'schemas')
+
+
+def digest(*parts: str) -> str:
+    '''Hex sha256 over the given strings, used to chain stage keys.'''
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode())
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def file_digest(p: Path) -> str:
+    '''Content hash of a file, or of every file under a directory (relative names included).
+
+    :param p: File or dataset directory.
+    :type p: Path
+
+    :returns: Hex sha256, or an empty string when nothing exists at `p`.
+    :rtype: str
+    '''
+    files = sorted(f for f in p.rglob('*') if f.is_file()) if p.is_dir() else [p] if p.is_file() else []
+    h = hashlib.sha256()
+    for f in files:
+        h.update(str(f.relative_to(p) if p.is_dir() else f.name).encode())
+        with open(f, 'rb') as fh:
+            for block in iter(lambda: fh.read(1 << 20), b''):
+                h.update(block)
+    return h.hexdigest() if files else ''
+
+
+def frame_digest(df: 'pd.DataFrame') -> str:
+    '''Content hash of a DataFrame's values, index, column names and dtypes.'''
+    h = hashlib.sha256(str(list(zip(df.columns, map(str, df.dtypes)))).encode())
+    import pandas as pd
+    h.update(pd.util.hash_pandas_object(df, index = True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def code_digest(cls: type) -> str:
+    '''Code version of a component: its module source plus the project modules that module pulls names from.'''
+    module = sys.modules[cls.__module__]
+    names = {module.__name__}
+    for obj in vars(module).values():
+        name = getattr(obj, '__module__', None) if not hasattr(obj, '__file__') else obj.__name__
+        if isinstance(name, str) and name.split('.', 1)[0] in PROJECT_PACKAGES:
+            names.add(name)
+
+    h = hashlib.sha256()
+    for name in sorted(names):
+        src = getattr(sys.modules.get(name), '__file__', None)
+        if src and os.path.isfile(src):
+            h.update(name.encode())
+            with open(src, 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def path_stat(p: Path) -> list[int] | None:
+    '''Latest modification time (ns) and total size of a file or of every file under a directory, None when missing.'''
+    files = [f for f in p.rglob('*') if f.is_file()] if p.is_dir() else [p] if p.is_file() else []
+    if not files:
+        return None
+    stats = [f.stat() for f in files]
+    return [max(st.st_mtime_ns for st in stats), sum(st.st_size for st in stats)]
+
+
+class Checkpoints:
+    '''Content-addressed stage outputs under `Settings.storage/checkpoints`.
+    Transformer outputs are pickled under the key of the stage that produced them, loaders leave a marker once they
+    have loaded a given input so an unchanged re-run can skip them, as long as the files they wrote are still in place
+    unchanged. Each stage keeps only its latest output and marker,
+    a head file per stage names the current key and the superseded files are deleted when a new one is written.
+
+    :param force: Ignore every existing checkpoint, outputs are still written. Defaults to False.
+    :type force: bool
+    :param from_stage: Component name from which checkpoints are ignored, stages upstream of it are still reused. Defaults to None.
+    :type from_stage: str | None
+    '''
+    def __init__(self, force: bool = False, from_stage: str | None = None):
+        self.root = get_settings().storage / 'checkpoints'
+        self.force = force
+        self.from_stage = from_stage
+
+    def forced(self, chain: list[str]) -> bool:
+        '''Whether a stage has to re-run, given the component names leading up to and including it.'''
+        return self.force or self.from_stage in chain
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root / f'{key}{suffix}'
+
+    def _supersede(self, stage: str, key: str, suffix: str) -> None:
+        '''Points the stage's head at `key` and deletes the file of the key it pointed at before.'''
+        head = self.root / 'heads' / f'{digest(stage, suffix)[:32]}.json'
+        head.parent.mkdir(parents = True, exist_ok = True)
+        old = None
+        if head.is_file():
+            with open(head, 'r') as f:
+                old = json.load(f).get('key')
+
+        tmp = head.with_name(f'{head.name}.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'stage': stage, 'key': key}, f)
+        os.replace(tmp, head)
+
+        if old is not None and old != key:
+            self._path(old, suffix).unlink(missing_ok = True)
+            log.debug('Pruned superseded checkpoint %s of %s.', old[:12], stage)
+        return None
+
+    def has_frame(self, key: str) -> bool:
+        return self._path(key, '.pkl').is_file()
+
+    def load_frame(self, key: str) -> 'pd.DataFrame':
+        log.info('Checkpoint hit, loading stage output %s.', key[:12])
+        import pandas as pd
+        return pd.read_pickle(self._path(key, '.pkl'))
+
+    def save_frame(self, key: str, df: 'pd.DataFrame', stage: str) -> None:
+        '''Checkpoints a transformer output and drops the stage's previous one.
+
+        :param stage: Stage name, e.g. `stage_key(extractor, transformers[:i + 1])`.
+        :type stage: str
+        '''
+        # Written next to the target and renamed, a crash mid-write never leaves a readable half checkpoint
+        self.root.mkdir(parents = True, exist_ok = True)
+        p = self._path(key, '.pkl')
+        tmp = p.with_suffix('.tmp')
+        df.to_pickle(tmp)
+        os.replace(tmp, p)
+        self._supersede(stage, key, '.pkl')
+        log.debug('Checkpointed stage output %s.', key[:12])
+        return None
+
+    def is_done(self, key: str) -> bool:
+        '''Whether a loader marker exists for `key` and every target it recorded still has the same size and mtime.'''
+        p = self._path(key, '.done')
+        if not p.is_file():
+            return False
+        with open(p, 'r') as f:
+            targets = json.load(f).get('targets', {})
+        changed = [t for t, stat in targets.items() if path_stat(Path(t)) != stat]
+        if changed:
+            log.info('Output %s changed or went missing since its last load, re-running.', ', '.join(changed))
+        return not changed
+
+    def mark_done(self, key: str, name: str, chain: str, targets: 'Iterable[Path]' = ()) -> None:
+        '''Marks loader `name` as having loaded input `key` and drops its marker for the input it loaded before.
+
+        :param chain: Stage name of the loaded frame, e.g. `stage_key(extractor, transformers)`.
+        :type chain: str
+        :param targets: Files or directories the loader wrote, their size and mtime are recorded with the marker. Defaults to none.
+        :type targets: Iterable[Path]
+        '''
+        self.root.mkdir(parents = True, exist_ok = True)
+        recorded = {str(t): path_stat(Path(t)) for t in targets}
+        with open(self._path(key, '.done'), 'w') as f:
+            json.dump({'component': name, 'loaded': datetime.now().isoformat(), 'targets': recorded}, f)
+        self._supersede(f'{chain}>{name}', key, '.done')
+        return None
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
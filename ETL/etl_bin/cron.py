@@ -0,0 +1,86 @@
+# Import dependencies
+from datetime import datetime, timedelta
+import logging
+log = logging.getLogger(__name__)
+
+# (name, lowest, highest) of the five cron fields
+_FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+# Shorthands accepted in place of the five fields
+_ALIASES = {
+    '@hourly':  '0 * * * *',
+    '@daily':   '0 0 * * *',
+    '@weekly':  '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+
+
+def _parse_field(spec: str, name: str, lo: int, hi: int) -> set[int]:
+    '''Expands one cron field (`*`, `5`, `1-5`, `*/15`, `0-30/10` and comma lists of those) into its values.'''
+    values: set[int] = set()
+    for part in spec.split(','):
+        rng, _, step = part.partition('/')
+        if rng == '*':
+            start, end = lo, hi
+        elif '-' in rng:
+            start, end = map(int, rng.split('-', 1))
+        else:
+            start = end = int(rng)
+        if not (lo <= start <= end <= hi) or (step and int(step) < 1):
+            raise ValueError(f'Cron {name} field {part!r} is invalid, values lie in {lo}-{hi} and steps are positive.')
+        values.update(range(start, end + 1, int(step) if step else 1))
+    return values
+
+
+class CronSchedule:
+    '''Five-field cron expression (minute hour day month weekday) in local time, or one of `@hourly`, `@daily`,
+    `@weekly` and `@monthly`. Weekday 0 and 7 are both Sunday. As in cron, when day and weekday are both
+    restricted a day matching either one counts.
+
+    :param expr: Cron expression, e.g. `*/15 6-22 * * 1-5`.
+    :type expr: str
+    '''
+    def __init__(self, expr: str):
+        self.expr = expr
+        fields = _ALIASES.get(expr.strip(), expr).split()
+        if len(fields) != 5:
+            raise ValueError(f'Cron expression {expr!r} needs 5 fields, got {len(fields)}.')
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(spec, *field) for spec, field in zip(fields, _FIELDS)
+        )
+        self.weekdays = {d % 7 for d in weekdays}
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    def __repr__(self) -> str:
+        return f'CronSchedule({self.expr!r})'
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        # cron counts Sunday as 0, isoweekday as 7
+        in_weekdays = day.isoweekday() % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, after: datetime) -> datetime:
+        '''First matching minute strictly after `after`.'''
+        start = after.replace(second = 0, microsecond = 0) + timedelta(minutes = 1)
+        day = start.replace(hour = 0, minute = 0)
+        # Four years and a day covers every day/month combination, including 29 February
+        for _ in range(4 * 366 + 1):
+            if self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        at = day.replace(hour = hour, minute = minute)
+                        if at >= start:
+                            return at
+            day += timedelta(days = 1)
+        raise ValueError(f'Cron expression {self.expr!r} never matches.')
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
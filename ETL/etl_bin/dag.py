@@ -0,0 +1,50 @@
+# Import dependencies
+import logging
+log = logging.getLogger(__name__)
+
+
+def topo_order(upstream: dict[str, list[str]]) -> list[str]:
+    '''Orders pipelines so every one comes after its upstreams, keeping the given order between independent ones.
+
+    :param upstream: Upstream pipeline names keyed by pipeline name, every name must be a key.
+    :type upstream: dict[str, list[str]]
+
+    :returns: Pipeline names in a runnable order.
+    :rtype: list[str]
+    '''
+    order: list[str] = []
+    left = list(upstream)
+    while left:
+        ready = [name for name in left if all(u in order for u in upstream[name])]
+        if not ready:
+            raise ValueError(f'Pipeline dependencies form a cycle between: {", ".join(left)}')
+        order.extend(ready)
+        left = [name for name in left if name not in ready]
+    return order
+
+
+def critical_path(upstream: dict[str, list[str]], durations: dict[str, float]) -> tuple[list[str], float]:
+    '''Longest chain of dependent pipelines by wall time, the floor for the task however many workers it gets.
+    Pipelines without a duration (failed or skipped) are left out.
+
+    :param upstream: Upstream pipeline names keyed by pipeline name.
+    :type upstream: dict[str, list[str]]
+    :param durations: Wall time in seconds of every pipeline that completed.
+    :type durations: dict[str, float]
+
+    :returns: Pipeline names along the path and its total wall time.
+    :rtype: tuple[list[str], float]
+    '''
+    best: dict[str, tuple[float, list[str]]] = {}
+    for name in topo_order(upstream):
+        if name not in durations:
+            continue
+        total, path = max((best[u] for u in upstream[name] if u in best), default = (0.0, []), key = lambda b: b[0])
+        best[name] = (total + durations[name], path + [name])
+    total, path = max(best.values(), default = (0.0, []), key = lambda b: b[0])
+    return path, total
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
@@ -1,29 +1,95 @@
 # Import dependencies
 from abc import ABC, abstractmethod
-import pandas as pd
+from collections.abc import Iterator, Iterable
+from typing import TYPE_CHECKING
 
 # Bring in log exception handler
 from core import log_exceptions
+from ETL.etl_bin.categories import concat_chunks
+
+# Frames only appear in annotations here, the components that build them import pandas themselves
+if TYPE_CHECKING:
+    from pathlib import Path
+    import pandas as pd
 # An important note:
 #   - log_exceptions should only be used as a wrapper to handle exceptions that bubble up
 #   - all other helper methods should be denoted with the single underscore '_' and be called by the predefined methods
 
 
-class BaseExtractor(ABC):
+class _Lifecycle:
+    # TaskRunner builds one instance per component and run, calls setup() before its first use and teardown() when
+    # the run ends. Expensive resources (models, sessions, HTTP clients) belong in setup() rather than __init__,
+    # which also runs when the runner only needs a fingerprint
+    def setup(self) -> None:
+        return None
+
+    def teardown(self) -> None:
+        return None
+
+    # Attributes holding the frames of a single extract/transform/load call. The runner keeps the instance for the
+    # rest of the run, so it resets them through release() once each call returns rather than keep the frames alive
+    frame_attrs: tuple[str, ...] = ()
+
+    def release(self) -> None:
+        for attr in self.frame_attrs:
+            if hasattr(self, attr):
+                setattr(self, attr, None)
+        return None
+
+
+class BaseExtractor(_Lifecycle, ABC):
     @log_exceptions
     @abstractmethod
-    def extract(self) -> pd.DataFrame: ...
+    def extract(self) -> 'pd.DataFrame': ...
+
+    # Streaming counterpart of extract(), sources that can be read in pieces override it to yield chunks
+    def extract_chunks(self) -> 'Iterator[pd.DataFrame]':
+        yield self.extract()
+
+    # Content fingerprint of the source (e.g. a hash of the input file). Only extractors that provide one can be
+    # skipped by checkpointed runs, the others are always re-run and keyed by the hash of what they returned
+    def fingerprint(self) -> str | None:
+        return None
+
+    # Called once every loader of the pipeline has taken what extract()/extract_chunks() returned, so sources that
+    # track what they have delivered (high-water marks, cursors) only advance after a successful load. Batch runs
+    # pass the extracted frame, streaming runs pass None as the chunks are gone by then
+    def commit(self, df: 'pd.DataFrame | None' = None) -> None:
+        return None
+
+class BaseTransformer(_Lifecycle, ABC):
+    # Set by transformers that must see every row at once (groupbys, sorts), streaming runs materialize before them
+    needs_full_frame: bool = False
 
-class BaseTransformer(ABC):
     @log_exceptions
     @abstractmethod
-    def transform(self) -> pd.DataFrame: ...
+    def transform(self) -> 'pd.DataFrame': ...
+
+    # Extra state mixed into the checkpoint key besides class, params and code version
+    def fingerprint(self) -> str | None:
+        return None
 
-class BaseLoader(ABC):
+class BaseLoader(_Lifecycle, ABC):
     @log_exceptions
     @abstractmethod
     def load(self) -> None: ...
 
+    # Extra state mixed into the checkpoint key besides class, params and code version
+    def fingerprint(self) -> str | None:
+        return None
+
+    # Files or directories the loader writes. Checkpointed runs record their size and modification time with the
+    # loader's marker and only skip it while every one of them is still there unchanged
+    def targets(self) -> 'list[Path]':
+        return []
+
+    # Streaming counterpart of load(), by default the chunks are materialized and loaded once
+    def load_chunks(self, chunks: 'Iterable[pd.DataFrame]') -> None:
+        frames = list(chunks)
+        if frames:
+            self.load(concat_chunks(frames))
+        return None
+
 
 # EOF
 
@@ -0,0 +1,169 @@
+# Import dependencies
+from collections.abc import Callable
+from threading import Thread, Event
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+import resource
+import json
+import time
+import os
+import logging
+log = logging.getLogger(__name__)
+
+# Custom libraries
+from core import get_settings
+
+# Only for annotations, frames are measured with a local import
+if TYPE_CHECKING:
+    import pandas as pd
+
+_PAGE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _rss() -> int:
+    '''Current resident set size in bytes, falling back to the lifetime peak where /proc is not available.'''
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * _PAGE
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _shape(obj: Any) -> tuple[int | None, int | None]:
+    # Loaders may take several frames, their sizes add up
+    import pandas as pd
+    frames = [obj] if isinstance(obj, pd.DataFrame) else [f for f in obj if isinstance(f, pd.DataFrame)] if isinstance(obj, list) else []
+    if not frames:
+        return None, None
+    return sum(len(f) for f in frames), int(sum(f.memory_usage(deep = True).sum() for f in frames))
+
+
+class _RssSampler(Thread):
+    # Polls RSS so short-lived peaks inside a stage (e.g. a concat) are caught, not just the level at the end
+    def __init__(self, interval: float = 0.02):
+        super().__init__(daemon = True, name = 'rss-sampler')
+        self.interval = interval
+        self.base = self.peak = _rss()
+        self._done = Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, _rss())
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, _rss())
+        return self.peak - self.base
+
+
+class StageTimer:
+    '''Measures one component call: wall and CPU time, rows and bytes in and out, and the peak RSS growth.
+    Byte sizes are taken outside the timed region. CPU time and RSS are process-wide, so stages running
+    concurrently on threads see each other's usage.
+
+    :param stage: `extract`, `transform` or `load`.
+    :type stage: str
+    :param component: Component name from the pipeline.yml.
+    :type component: str
+    :param df_in: Input frame (or frames for a loader), None for extractors.
+    :type df_in: pd.DataFrame | list[pd.DataFrame] | None
+    :param sink: Called with the finished record, also when the stage raised. Defaults to None.
+    :type sink: Callable[[dict], None] | None
+    '''
+    def __init__(self, stage: str, component: str, df_in: 'pd.DataFrame | list[pd.DataFrame] | None' = None, sink: Callable[[dict], None] | None = None):
+        self.sink = sink
+        rows_in, bytes_in = _shape(df_in)
+        self.record: dict[str, Any] = {
+            'stage':        stage,
+            'component':    component,
+            'rows_in':      rows_in,
+            'bytes_in':     bytes_in,
+            'rows_out':     None,
+            'bytes_out':    None,
+        }
+        self._out = None
+
+    def output(self, df: 'pd.DataFrame') -> None:
+        self._out = df
+        return None
+
+    def __enter__(self) -> 'StageTimer':
+        self._sampler = _RssSampler()
+        self._sampler.start()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        peak = self._sampler.stop()
+        rows_out, bytes_out = _shape(self._out)
+        self.record.update({
+            'status':       'ok' if exc is None else 'failed',
+            'wall_s':       round(wall, 4),
+            'cpu_s':        round(cpu, 4),
+            'rss_peak_mb':  round(peak / 1e6, 2),
+            'rows_out':     rows_out,
+            'bytes_out':    bytes_out,
+        })
+        if exc is not None:
+            self.record['error'] = repr(exc)
+            # Travels with the exception, also out of a process pool worker, so failed stages still get reported
+            try:
+                exc.stage_record = self.record
+            except AttributeError:
+                pass
+        if self.sink is not None:
+            self.sink(self.record)
+        return None
+
+
+class RunReport:
+    '''Collects stage records for one `TaskRunner.run` call and appends them as NDJSON to
+    `Settings.storage/reports/<run_id>.ndjson` as they arrive, so a crashed run still leaves a partial report.
+
+    :param name: Task or pipeline name that was run.
+    :type name: str
+    '''
+    def __init__(self, name: str):
+        self.name = name
+        self.started = datetime.now()
+        self.run_id = f'{self.started:%Y%m%dT%H%M%S}_{name}'
+        self.p = get_settings().storage / 'reports' / f'{self.run_id}.ndjson'
+        self.records: list[dict[str, Any]] = []
+
+    def add(self, pipeline: str, record: dict[str, Any]) -> None:
+        record = {'run_id': self.run_id, 'pipeline': pipeline, 'ts': datetime.now().isoformat(), **record}
+        self.records.append(record)
+        self.p.parent.mkdir(parents = True, exist_ok = True)
+        with open(self.p, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        return None
+
+    def extend(self, records: list[dict[str, Any]]) -> None:
+        '''Takes in records a process pool worker already appended to the report file, without writing them again.'''
+        self.records.extend(records)
+        return None
+
+    def summary(self) -> str:
+        '''Fixed-width table of every recorded stage, in the order they finished.'''
+        head = f'{"pipeline":<18} {"stage":<9} {"component":<18} {"status":<6} {"wall_s":>8} {"cpu_s":>8} {"rows_in":>9} {"rows_out":>9} {"mb_out":>8} {"rss_mb":>8}'
+        lines = [f'Run {self.run_id}', head, '-' * len(head)]
+        for r in self.records:
+            mb_out = f'{r["bytes_out"] / 1e6:.1f}' if r.get('bytes_out') is not None else '-'
+            lines.append(
+                f'{r["pipeline"]:<18} {r["stage"]:<9} {r["component"]:<18} {r.get("status", "-"):<6} '
+                f'{r.get("wall_s", 0):>8.2f} {r.get("cpu_s", 0):>8.2f} '
+                f'{r["rows_in"] if r.get("rows_in") is not None else "-":>9} {r["rows_out"] if r.get("rows_out") is not None else "-":>9} '
+                f'{mb_out:>8} {r.get("rss_peak_mb", 0):>8.1f}'
+            )
+        total = sum(r.get('wall_s', 0) for r in self.records)
+        lines.append(f'{len(self.records)} stages, {total:.2f}s of stage time, report at {self.p}')
+        return '\n'.join(lines)
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
@@ -0,0 +1,142 @@
+# Import dependencies
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from threading import Thread, Event, get_ident
+from pathlib import Path
+import cProfile
+import pstats
+import sys
+import os
+import logging
+log = logging.getLogger(__name__)
+
+# Custom libraries
+from core import get_settings
+
+
+def _func_label(func: tuple[str, int, str]) -> str:
+    filename, line, name = func
+    return f'{name} ({os.path.basename(filename)}:{line})'
+
+
+class _StackSampler(Thread):
+    # Samples the call stack of one thread at a fixed interval, the counts become flamegraph input
+    def __init__(self, target: int, interval: float):
+        super().__init__(daemon = True, name = 'stack-sampler')
+        self.target = target
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._done = Event()
+
+    @staticmethod
+    def _label(frame) -> str:
+        code = frame.f_code
+        return _func_label((code.co_filename, code.co_firstlineno, code.co_name))
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> Counter[str]:
+        self._done.set()
+        self.join()
+        return self.stacks
+
+
+def _pstats_stacks(prof: cProfile.Profile) -> Counter[str]:
+    '''Collapsed stacks rebuilt from the cProfile caller graph, weighted by self time in microseconds.
+    Time of a function called from several places is split over its callers by their share of its cumulative time,
+    so the stacks are an estimate, but unlike the sampler they cover calls shorter than one interval.'''
+    stats = pstats.Stats(prof).stats
+    callees = defaultdict(list)
+    for func, (*_, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller].append((func, edge[3]))
+
+    stacks: Counter[str] = Counter()
+    def walk(func, path: list[str], seen: set, share: float) -> None:
+        _, _, tt, ct, _ = stats[func]
+        path = path + [_func_label(func)]
+        us = round(tt * share * 1e6)
+        if us:
+            stacks[';'.join(path)] += us
+        for callee, edge_ct in callees[func]:
+            # Recursion would loop forever, and branches under a microsecond add nothing but noise
+            callee_ct = stats[callee][3]
+            if callee in seen or not callee_ct or share * edge_ct < 1e-6:
+                continue
+            walk(callee, path, seen | {callee}, share * edge_ct / callee_ct)
+        return None
+
+    for func, (*_, callers) in stats.items():
+        if not callers:
+            walk(func, [], {func}, 1.0)
+    return stacks
+
+
+class Profiler:
+    '''Profiles component calls of a run, writing `<stage>_<component>.prof` (cProfile, for pstats or snakeviz) and
+    `<stage>_<component>.collapsed` (sampled stacks in collapsed format, for flamegraph.pl or speedscope)
+    under `Settings.storage/profiles/<run_id>/`. Calls too short for a single sample get their collapsed stacks
+    from the cProfile caller graph instead, weighted by microseconds rather than samples.
+    Only the calling thread is traced, so the runner serializes its stages while a profiler is active.
+
+    :param run_id: Run identifier, names the output directory.
+    :type run_id: str
+    :param only: Only profile the component with this name. Defaults to None, profiling all of them.
+    :type only: str | None
+    :param interval: Seconds between stack samples. Defaults to 0.005.
+    :type interval: float
+    '''
+    def __init__(self, run_id: str, only: str | None = None, interval: float = 0.005):
+        self.dir = get_settings().storage / 'profiles' / run_id
+        self.only = only
+        self.interval = interval
+        self._seen: Counter[str] = Counter()
+
+    def _stem(self, stage: str, component: str) -> Path:
+        # The same component can run more than once per run (several extractors, several pipelines)
+        base = f'{stage}_{component}'
+        self._seen[base] += 1
+        n = self._seen[base]
+        return self.dir / (base if n == 1 else f'{base}_{n}')
+
+    @contextmanager
+    def _profile(self, stage: str, component: str) -> Iterator[None]:
+        stem = self._stem(stage, component)
+        self.dir.mkdir(parents = True, exist_ok = True)
+        sampler = _StackSampler(get_ident(), self.interval)
+        prof = cProfile.Profile()
+        sampler.start()
+        prof.enable()
+        try:
+            yield None
+        finally:
+            prof.disable()
+            stacks = sampler.stop()
+            source = 'samples'
+            if not stacks:
+                stacks, source = _pstats_stacks(prof), 'us from the caller graph'
+            prof.dump_stats(stem.with_suffix('.prof'))
+            with open(stem.with_suffix('.collapsed'), 'w') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+            log.info('Profile for %s %s written to %s.{prof,collapsed} (%d %s).', stage, component, stem, sum(stacks.values()), source)
+
+    def profile(self, stage: str, component: str):
+        '''Context manager profiling one component call, a no-op for components filtered out by `only`.'''
+        if self.only is not None and component != self.only:
+            return nullcontext()
+        return self._profile(stage, component)
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
@@ -0,0 +1,28 @@
+# Import dependencies
+from pathlib import Path
+
+# Custom libraries
+from core import get_settings
+
+# Columnar dataset layout shared by the columnar loaders and extractors
+PARTITION_COL:  str = 'inspection_year'
+SORT_KEY:       bytes = b'curry.sort_order'
+
+
+def dataset_path(name: str, suffix: str = '') -> Path:
+    '''Location of a named dataset under `Settings.storage`.
+
+    :param name: Dataset name from the pipeline.yml params.
+    :type name: str
+    :param suffix: File suffix, empty for directory based datasets. Defaults to ''.
+    :type suffix: str
+
+    :returns: Path to the dataset file or directory.
+    :rtype: Path
+    '''
+    return get_settings().storage / f'{name}{suffix}'
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
@@ -1,8 +1,11 @@
 # Import dependencies
-from pydantic import BaseModel, Field
-from typing import Any
+from pydantic import BaseModel, Field, model_validator, field_validator
+from typing import Any, Literal
 import yaml, os, re
 
+from .dag import topo_order
+from .cron import CronSchedule
+
 ENV_REF = re.compile(r'\$\{env:([A-Za-z0-9_]+)\}')
 
 def expand_env(obj) -> dict:
@@ -34,9 +37,67 @@ class YamlPipelines(BaseModel):
     extractors:     list[str]
     transformers:   list[str]
     loaders:        list[str]
+    streaming:      bool            = False
+    queue_size:     int             = 4
+    max_workers:    int             = 1
+    executor:       Literal['thread', 'process'] = 'thread'
+    checkpoint:     bool            = False
+
+    @model_validator(mode = 'after')
+    def _mode_validation(self) -> 'YamlPipelines':
+        # Streamed chunks never exist as a whole frame to save, the runner would otherwise drop checkpointing silently
+        if self.streaming and self.checkpoint:
+            raise ValueError('streaming and checkpoint cannot both be enabled for a pipeline')
+        return self
+
+class YamlArtifacts(BaseModel):
+    keep:           list[str]
+    memory_mb:      float           = 2048
+    spill:          bool            = True
 
 class YamlTasks(BaseModel):
     pipelines:      list[str]
+    artifacts:      YamlArtifacts | None = None
+    # Upstream pipelines per pipeline, omitted means each pipeline waits for the one listed before it
+    depends:        dict[str, list[str]] | None = None
+    max_workers:    int             = 1
+    on_failure:     Literal['fail_fast', 'continue'] = 'fail_fast'
+
+    @model_validator(mode = 'after')
+    def _dag_validation(self) -> 'YamlTasks':
+        # Without depends the pipelines simply run in the listed order, the same pipeline may appear more than once
+        if self.depends is None:
+            return self
+        # A graph keyed by pipeline name cannot tell two entries of one pipeline apart
+        twice = sorted({p for p in self.pipelines if self.pipelines.count(p) > 1})
+        if twice:
+            raise ValueError(f'Pipeline(s) listed twice in a task with depends: {", ".join(twice)}')
+        # Dependencies may only name pipelines of the task and must not loop
+        for name, ups in self.depends.items():
+            unknown = [p for p in [name, *ups] if p not in self.pipelines]
+            if unknown:
+                raise ValueError(f'depends names pipelines that are not part of the task: {", ".join(unknown)}')
+        topo_order(self.upstream())
+        return self
+
+    def upstream(self) -> dict[str, list[str]]:
+        '''Upstream pipelines of every pipeline in the task. Without `depends` each waits for the one listed before it,
+        the runner then runs them in order rather than through this graph, as names may repeat.'''
+        if self.depends is None:
+            return {name: self.pipelines[:i][-1:] for i, name in enumerate(self.pipelines)}
+        return {name: list(self.depends.get(name, [])) for name in self.pipelines}
+
+class YamlSchedules(BaseModel):
+    task:           str
+    cron:           str
+    force:          bool            = False
+
+    @field_validator('cron')
+    @classmethod
+    def _cron_validation(cls, v: str) -> str:
+        # Parsed once here so a typo fails when the config loads, not at the first scheduled run
+        CronSchedule(v)
+        return v
 
 class YamlETL(BaseModel):
     extractors:     dict[str, YamlComponents]
@@ -44,6 +105,15 @@ class YamlETL(BaseModel):
     loaders:        dict[str, YamlComponents]
     pipelines:      dict[str, YamlPipelines]
     tasks:          dict[str, YamlTasks]
+    schedules:      dict[str, YamlSchedules] = Field(default_factory = dict)
+
+    @model_validator(mode = 'after')
+    def _schedule_validation(self) -> 'YamlETL':
+        # Schedules may name a task or a single pipeline
+        for name, sched in self.schedules.items():
+            if sched.task not in self.tasks and sched.task not in self.pipelines:
+                raise ValueError(f'Schedule {name} runs {sched.task}, which is neither a task nor a pipeline.')
+        return self
 
 
     @classmethod
@@ -0,0 +1,56 @@
+# Import dependencies
+import pyarrow as pa
+import pandas as pd
+import logging
+log = logging.getLogger(__name__)
+
+# Abstract class to de-couple extraction classes from Pipeline
+from ETL.etl_bin import BaseExtractor
+from ETL.etl_bin.storage import dataset_path
+from ETL.etl_bin.checkpoints import file_digest
+
+
+def _arrow_types(arrow_type: pa.DataType) -> pd.ArrowDtype | None:
+    # Dictionary columns still come back as pandas Categoricals
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+class InspectionArrow(BaseExtractor):
+    '''Opens the Arrow IPC file written by `SaveInspectionsArrow` through a memory map.
+    The column buffers are pages of the file in the OS page cache, so concurrent pipelines and grid-search
+    workers reading the same file share them instead of each parsing a private copy.
+
+    :param name: File name (without suffix) under `Settings.storage`.
+    :type name: str
+    :param columns: Columns to read. Defaults to all.
+    :type columns: list[str] | None
+    :param arrow_dtypes: Keep Arrow-backed pandas dtypes so the frame wraps the mapped buffers without materializing
+        a numpy copy. Defaults to False, which converts to regular numpy-backed dtypes.
+    :type arrow_dtypes: bool
+    '''
+    def __init__(self, name: str, columns: list[str] | None = None, arrow_dtypes: bool = False):
+        self.p = dataset_path(name, '.arrow')
+        self.columns = columns
+        self.arrow_dtypes = arrow_dtypes
+
+    def fingerprint(self) -> str | None:
+        return file_digest(self.p) or None
+
+    def extract(self) -> pd.DataFrame:
+        # The mapping is kept alive by the buffers that reference it, it is released with the last of them
+        source = pa.memory_map(str(self.p), 'r')
+        table = pa.ipc.open_file(source).read_all()
+        if self.columns:
+            table = table.select(self.columns)
+
+        if self.arrow_dtypes:
+            df = table.to_pandas(types_mapper = _arrow_types)
+        else:
+            df = table.to_pandas(split_blocks = True)
+        log.info('Mapped %d rows (%.1f MB) from Arrow IPC file %s.', table.num_rows, table.nbytes / 1e6, self.p)
+        return df
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
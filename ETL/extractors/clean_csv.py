@@ -1,15 +1,21 @@
 # Import dependencies
+from collections.abc import Iterator
 import pandas as pd
 
 # Abstract class to de-couple extraction classes from Pipeline
-from ETL.etl_bin import BaseExtractor
+from ETL.etl_bin import BaseExtractor, CategorySchema
+from ETL.etl_bin.checkpoints import file_digest
 from core import get_settings
 
 
 class CleanedInspectionCSV(BaseExtractor):
-    def __init__(self, name: str):
+    frame_attrs = ('df',)
+
+    def __init__(self, name: str, categories: str | None = None, chunksize: int = 100_000):
         self.name = name
         self.cfg = get_settings()
+        self.schema = CategorySchema(categories) if categories else None
+        self.chunksize = chunksize
 
     def _convert_int(self, cols: list[str]):
         self.df[cols] = self.df[cols].astype(int)
@@ -22,12 +28,34 @@ class CleanedInspectionCSV(BaseExtractor):
     def _convert_dt(self, cols: list[str]):
         self.df[cols] = self.df[cols].apply(pd.to_datetime)
 
-    def extract(self) -> pd.DataFrame:
-        p = self.cfg.storage / f'{self.name}.csv'
-        self.df = pd.read_csv(p)
-        
+    def _convert_all(self):
         self._convert_int(['camis', 'zipcode', 'score', 'census_tract'])
         self._convert_flt(['latitude', 'longitude'])
         self._convert_dt(['inspection_date'])
+        if self.schema is not None:
+            self.schema.apply(self.df)
+        return self
+
+    def fingerprint(self) -> str | None:
+        # The stored vocabularies decide the category order of the extracted frame, so they count as input too
+        # A missing file has no fingerprint, the chain is then extracted and fails on the read instead of being skipped
+        vocab = file_digest(self.schema.p) if self.schema else ''
+        csv = file_digest(self.cfg.storage / f'{self.name}.csv')
+        return csv + vocab if csv else None
 
+    def _read_csv(self, **kwargs):
+        p = self.cfg.storage / f'{self.name}.csv'
+        dtypes = {c: 'category' for c in self.schema.columns} if self.schema else None
+        return pd.read_csv(p, dtype = dtypes, **kwargs)
+
+    def extract_chunks(self) -> Iterator[pd.DataFrame]:
+        with self._read_csv(chunksize = self.chunksize) as reader:
+            for chunk in reader:
+                self.df = chunk
+                self._convert_all()
+                yield self.df
+
+    def extract(self) -> pd.DataFrame:
+        self.df = self._read_csv()
+        self._convert_all()
         return self.df
\ No newline at end of file
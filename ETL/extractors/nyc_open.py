@@ -1,49 +1,332 @@
 # Import dependencies
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections.abc import Iterator
+from collections import deque
+from typing import Literal
 from sodapy import Socrata
+from sqlalchemy import select, func
 import datetime as dt
 import pandas as pd
+import requests
+import json
+import time
+import logging
+log = logging.getLogger(__name__)
 
 # Abstract class to de-couple extraction classes from Pipeline
 from ETL.etl_bin import BaseExtractor
+from core import Database, get_session_factory, get_settings
+from schemas import Inspection
+
+# SoQL select list, output columns are the alias (if any) of each entry
+SELECT_COLUMNS = [
+    'camis',
+    'boro',
+    'zipcode',
+    'cuisine_description AS cuisine',
+    'inspection_date',
+    'inspection_type',
+    'action',
+    'violation_code',
+    'critical_flag',
+    'score',
+    'census_tract',
+    'nta',
+    'latitude',
+    'longitude',
+]
+# Socrata hands every field back as text, these are parsed on the way out so pages and single requests share one schema
+NUMERIC_COLUMNS = ['camis', 'zipcode', 'score', 'census_tract', 'latitude', 'longitude']
+DATE_COLUMNS = ['inspection_date']
+
 
 class RawInspectionData(BaseExtractor):
-    def __init__(self, domain: str, uri_id: str, nyc_open_key: str, years_cutoff: int, row_limit: int):
+    '''Extracts raw inspection rows from the NYC Open Data (Socrata) API.
+
+    Without `page_size` the whole query is pulled in a single request capped at `row_limit`.
+    With `page_size` the query is split into `$limit`/`$offset` pages which are fetched on a bounded thread pool,
+    retried with exponential backoff and handed back in order as DataFrame chunks.
+    Either way the numeric columns come back as float64 (int64 when nothing is missing) and `inspection_date` as datetime64,
+    unparseable values become missing.
+
+    :param page_size: Rows per page; enables the paged mode when set. Defaults to None.
+    :type page_size: int | None
+    :param max_workers: Pages fetched at once in paged mode. Defaults to 4.
+    :type max_workers: int
+    :param max_retries: Retries per page on connection errors, 429s and 5xxs. Defaults to 3.
+    :type max_retries: int
+    :param backoff: Base seconds for exponential backoff between retries. Defaults to 1.0.
+    :type backoff: float
+    :param scheme: URL scheme used in paged mode, `http` allows pointing `domain` at a local fake server. Defaults to https.
+    :type scheme: str
+    :param incremental: Only request rows newer than the stored high-water mark (never older than `years_cutoff`). Defaults to False.
+    :type incremental: bool
+    :param watermark: Where the high-water mark lives, max `inspection_date` in Postgres or a state file under `Settings.storage`. Defaults to postgres.
+    :type watermark: Literal['postgres', 'file']
+    :param overlap_days: Days re-requested before the mark to catch late edits, duplicates are dropped by the loader's upsert. Defaults to 3.
+    :type overlap_days: int
+    '''
+    def __init__(
+            self,
+            domain: str,
+            uri_id: str,
+            nyc_open_key: str,
+            years_cutoff: int,
+            row_limit: int,
+            page_size: int | None = None,
+            max_workers: int = 4,
+            max_retries: int = 3,
+            backoff: float = 1.0,
+            timeout: int = 60,
+            scheme: str = 'https',
+            incremental: bool = False,
+            watermark: Literal['postgres', 'file'] = 'postgres',
+            overlap_days: int = 3
+        ):
+        self.domain = domain
         self.uri_id = uri_id
-        self.client = Socrata(domain, nyc_open_key)
+        self.app_token = nyc_open_key
 
         self.date_lim = (dt.datetime.now() - dt.timedelta(days = years_cutoff * 365)).isoformat()
         self.row_limit = row_limit
 
+        self.incremental = incremental
+        self.watermark = watermark
+        self.overlap = dt.timedelta(days = overlap_days)
+        self.watermark_path = get_settings().storage / f'{uri_id}_watermark.json'
+        self._since: str | None = None
+        self._pending: str | None = None
 
-    def extract(self) -> pd.DataFrame:
-        select_clause = (
-            'camis,'
-            'boro,'
-            'zipcode,'
-            'cuisine_description AS cuisine,'
-            'inspection_date,'
-            'inspection_type,'
-            'action,'
-            'violation_code,'
-            'critical_flag,'
-            'score,'
-            'census_tract,'
-            'nta,'
-            'latitude,'
-            'longitude'
-        )
-        where_clause = f'inspection_date > "{self.date_lim}" AND cuisine IS NOT NULL'
-        return pd.DataFrame.from_records(
-            self.client.get(
-                self.uri_id,
-                select = select_clause,
-                where = where_clause,
-                limit = self.row_limit
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.resource_url = f'{scheme}://{domain}/resource/{uri_id}.json'
+
+        self.columns = [c.rsplit(' AS ', 1)[-1] for c in SELECT_COLUMNS]
+        self.stats: dict[str, float] = {}
+        self.session: requests.Session | None = None
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        if self.app_token:
+            session.headers['X-App-Token'] = self.app_token
+        return session
+
+    def setup(self) -> None:
+        # One pooled HTTP session per run, shared by every page request and every extraction of the run
+        self.session = self._new_session()
+        return None
+
+    def teardown(self) -> None:
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        return None
+
+    def _read_watermark(self) -> dt.datetime | None:
+        if self.watermark == 'postgres':
+            db = Database(get_session_factory())
+            marks = db.execute_query(select(func.max(Inspection.inspection_date)))
+            mark = marks[0] if marks else None
+            return dt.datetime.combine(mark, dt.time()) if mark is not None else None
+
+        if not self.watermark_path.is_file():
+            return None
+        with open(self.watermark_path, 'r') as f:
+            return dt.datetime.fromisoformat(json.load(f)['inspection_date'])
+
+    def _write_watermark(self, mark: str | None) -> None:
+        # Postgres mode reads the mark straight from the loaded table, only the state file needs advancing.
+        # Only called from commit(), so a failed load leaves the mark where it was and the rows are requested again
+        if not self.incremental or self.watermark != 'file' or mark is None:
+            return None
+        with open(self.watermark_path, 'w') as f:
+            json.dump({'inspection_date': mark, 'updated': dt.datetime.now().isoformat()}, f, indent = 2)
+        log.info('Watermark advanced to %s.', mark)
+        return None
+
+    @property
+    def since(self) -> str:
+        '''Lower bound for `inspection_date`, resolved once per extraction.'''
+        if self._since is None:
+            self._since = self.date_lim
+            if self.incremental:
+                mark = self._read_watermark()
+                if mark is None:
+                    log.info('No %s watermark found, running a full extraction.', self.watermark)
+                else:
+                    self._since = max(self.date_lim, (mark - self.overlap).isoformat())
+                    log.info('Incremental extraction after %s (watermark %s, overlap %d days).', self._since, mark.date(), self.overlap.days)
+        return self._since
+
+    @property
+    def _select_clause(self) -> str:
+        return ','.join(SELECT_COLUMNS)
+
+    @property
+    def _where_clause(self) -> str:
+        return f'inspection_date > "{self.since}" AND cuisine IS NOT NULL'
+
+    @staticmethod
+    def _cast(df: pd.DataFrame) -> pd.DataFrame:
+        # A single request omits the fields that are null in every row, so only the columns present are cast
+        for col in NUMERIC_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors = 'coerce')
+        for col in DATE_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], format = 'ISO8601', errors = 'coerce')
+        return df
+
+    def _single_request(self) -> pd.DataFrame:
+        client = Socrata(self.domain, self.app_token)
+        try:
+            return pd.DataFrame.from_records(
+                client.get(
+                    self.uri_id,
+                    select = self._select_clause,
+                    where = self._where_clause,
+                    limit = self.row_limit
+                )
+            )
+        finally:
+            client.close()
+
+    def _get(self, session: requests.Session, params: dict[str, str | int]) -> tuple[list[dict], int]:
+        '''Single SoQL request with retry and exponential backoff.
+
+        :returns: Parsed records and the number of bytes received.
+        :rtype: tuple[list[dict], int]
+        '''
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = session.get(self.resource_url, params = params, timeout = self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                err = e
+            else:
+                if resp.ok:
+                    return resp.json(), len(resp.content)
+                # Client errors other than rate limiting will not get better by retrying
+                if resp.status_code < 500 and resp.status_code != 429:
+                    resp.raise_for_status()
+                err = requests.HTTPError(f'{resp.status_code} {resp.reason}', response = resp)
+
+            if attempt == self.max_retries:
+                raise err
+            wait = self.backoff * 2 ** attempt
+            log.warning('Socrata request failed (%s), retry %d/%d in %.1fs.', err, attempt + 1, self.max_retries, wait)
+            time.sleep(wait)
+
+    def _count_rows(self, session: requests.Session) -> int:
+        records, _ = self._get(session, {'$select': 'count(*) AS n', '$where': self._where_clause})
+        n = int(records[0]['n']) if records else 0
+        return min(n, self.row_limit)
+
+    def _get_page(self, session: requests.Session, offset: int, limit: int) -> tuple[pd.DataFrame, int]:
+        params = {
+            '$select':  self._select_clause,
+            '$where':   self._where_clause,
+            '$order':   ':id',
+            '$limit':   limit,
+            '$offset':  offset,
+        }
+        records, n_bytes = self._get(session, params)
+        # Fixing the columns keeps every chunk on the same schema even when a page has an all-null field
+        df = pd.DataFrame.from_records(records, columns = self.columns)
+        df.index = pd.RangeIndex(offset, offset + len(df))
+        return self._cast(df), n_bytes
+
+    def extract_pages(self) -> Iterator[pd.DataFrame]:
+        '''Yields the query as ordered DataFrame chunks of `page_size` rows, keeping at most `2 * max_workers` pages in flight.'''
+        session = self.session or self._new_session()
+
+        pages = rows = n_bytes = 0
+        started = time.perf_counter()
+        try:
+            total = self._count_rows(session)
+            offsets = iter(range(0, total, self.page_size))
+            log.info('Fetching %d rows from %s in pages of %d on %d workers.', total, self.uri_id, self.page_size, self.max_workers)
+
+            with ThreadPoolExecutor(max_workers = self.max_workers, thread_name_prefix = 'socrata') as pool:
+                in_flight: deque[Future] = deque()
+
+                def submit_next() -> None:
+                    offset = next(offsets, None)
+                    if offset is not None:
+                        limit = min(self.page_size, total - offset)
+                        in_flight.append(pool.submit(self._get_page, session, offset, limit))
+
+                for _ in range(self.max_workers * 2):
+                    submit_next()
+
+                while in_flight:
+                    df, size = in_flight.popleft().result()
+                    submit_next()
+                    pages += 1
+                    rows += len(df)
+                    n_bytes += size
+                    yield df
+        finally:
+            if session is not self.session:
+                session.close()
+            elapsed = time.perf_counter() - started
+            self.stats = {
+                'pages':            pages,
+                'rows':             rows,
+                'bytes':            n_bytes,
+                'seconds':          round(elapsed, 3),
+                'pages_per_sec':    round(pages / elapsed, 3) if elapsed else 0.0,
+            }
+            log.info(
+                'Fetched %d pages (%d rows, %.1f MB) in %.1fs, %.2f pages/s.',
+                pages, rows, n_bytes / 1e6, elapsed, self.stats['pages_per_sec']
             )
-        )
+
+    def extract_chunks(self) -> Iterator[pd.DataFrame]:
+        if not self.page_size:
+            yield self.extract()
+            return None
+
+        self._since = None
+        self._pending = None
+        marks = []
+        for df in self.extract_pages():
+            marks.append(self._mark(df))
+            yield df
+        self._pending = max((m for m in marks if m is not None), default = None)
+        return None
+
+    def extract(self) -> pd.DataFrame:
+        self._since = None
+        self._pending = None
+        if not self.page_size:
+            df = self._cast(self._single_request())
+        else:
+            chunks = list(self.extract_pages())
+            df = pd.concat(chunks, ignore_index = True) if chunks else self._cast(pd.DataFrame(columns = self.columns))
+
+        self._pending = self._mark(df)
+        return df
+
+    @staticmethod
+    def _mark(df: pd.DataFrame) -> str | None:
+        # Parsed first, transformers may have converted the column of the frame handed back by the runner
+        if df.empty or 'inspection_date' not in df.columns:
+            return None
+        mark = pd.to_datetime(df['inspection_date'], errors = 'coerce').max()
+        return mark.isoformat() if pd.notna(mark) else None
+
+    def commit(self, df: pd.DataFrame | None = None) -> None:
+        # Process pool runs extract in a worker, the runner then hands back the frame to take the mark from
+        mark = self._pending if df is None else self._mark(df)
+        self._pending = None
+        self._write_watermark(mark)
+        return None
 
 
 # EOF
 
 if __name__ == '__main__':
-    print('This module is intended to be imported, not run directly.')
\ No newline at end of file
+    print('This module is intended to be imported, not run directly.')
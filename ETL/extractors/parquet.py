@@ -0,0 +1,61 @@
+# Import dependencies
+from datetime import date as D
+import pyarrow.dataset as ds
+import pandas as pd
+import json
+import logging
+log = logging.getLogger(__name__)
+
+# Abstract class to de-couple extraction classes from Pipeline
+from ETL.etl_bin import BaseExtractor
+from ETL.etl_bin.storage import PARTITION_COL, SORT_KEY, dataset_path
+from ETL.etl_bin.checkpoints import file_digest
+
+
+class InspectionParquet(BaseExtractor):
+    '''Reads the Parquet dataset written by `SaveInspectionsParquet` with its stored dtypes, no re-parsing or casting.
+    Year filters prune whole partitions and date filters are pushed down to row-group statistics.
+
+    :param name: Dataset directory name under `Settings.storage`.
+    :type name: str
+    :param columns: Columns to read. Defaults to all stored columns.
+    :type columns: list[str] | None
+    :param min_year: Only read partitions with inspection year >= `min_year`. Defaults to None.
+    :type min_year: int | None
+    :param min_date: Only read rows with `inspection_date` >= `min_date`. Defaults to None.
+    :type min_date: date | str | None
+    '''
+    def __init__(self, name: str, columns: list[str] | None = None, min_year: int | None = None, min_date: D | str | None = None):
+        self.p = dataset_path(name)
+        self.columns = columns
+        self.min_year = min_year
+        self.min_date = min_date
+        self.sort_order: list[str] = []
+
+    def fingerprint(self) -> str | None:
+        return file_digest(self.p) or None
+
+    def _filter(self) -> ds.Expression | None:
+        filt = None
+        if self.min_year is not None:
+            filt = ds.field(PARTITION_COL) >= self.min_year
+        if self.min_date is not None:
+            by_date = ds.field('inspection_date') >= pd.Timestamp(self.min_date)
+            filt = by_date if filt is None else filt & by_date
+        return filt
+
+    def extract(self) -> pd.DataFrame:
+        dataset = ds.dataset(self.p, format = 'parquet', partitioning = 'hive')
+        metadata = dataset.schema.metadata or {}
+        self.sort_order = json.loads(metadata.get(SORT_KEY, b'[]'))
+
+        columns = self.columns or [c for c in dataset.schema.names if c != PARTITION_COL]
+        table = dataset.to_table(columns = columns, filter = self._filter())
+        df = table.to_pandas()
+        log.info('Read %d rows from Parquet dataset %s (sorted by %s).', len(df), self.p, self.sort_order)
+        return df
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
@@ -1,42 +1,117 @@
 # Import dependencies
-from sqlalchemy.orm import class_mapper
+from collections.abc import Iterator, Sequence
+from decimal import Decimal as dec
+from datetime import date as D
+from sqlalchemy import Row, Select, select
 import pandas as pd
+import numpy as np
+import logging
+log = logging.getLogger(__name__)
 
 # Abstract class to de-couple extraction classes from Pipeline
-from ETL.etl_bin import BaseExtractor
-from core import Database, get_session_factory
+from ETL.etl_bin import BaseExtractor, CategorySchema
+from core import get_engine
 from schemas import Inspection
 
 
 class FromInspectionDB(BaseExtractor):
-    def __init__(self):
-        self.db = Database(get_session_factory())
-
-    def _convert_int(self, cols: list[str]):
-        self.df[cols] = self.df[cols].astype(int)
-        return self
-    
-    def _convert_flt(self, cols: list[str]):
-        self.df[cols] = self.df[cols].astype(float).round(5)
-        return self
-    
-    def _convert_dt(self, cols: list[str]):
-        self.df[cols] = self.df[cols].apply(pd.to_datetime)
-
-    def _prepare_for_pandas(self, data: list[Inspection]):
-        cols = [r.key for r in class_mapper(Inspection).columns]
-        data = [dict(zip(cols, [getattr(row, col) for col in cols])) for row in data]
-        self.df = pd.DataFrame(data)
-        return self
+    '''Streams the inspection table through a server-side cursor with SQLAlchemy Core, no ORM objects are built.
+    Each batch of rows is turned column by column into typed arrays, filtering and projection happen in Postgres.
+
+    :param columns: Columns to select. Defaults to every column of the table.
+    :type columns: list[str] | None
+    :param min_date: Inclusive lower bound on `inspection_date`. Defaults to None.
+    :type min_date: date | str | None
+    :param max_date: Inclusive upper bound on `inspection_date`. Defaults to None.
+    :type max_date: date | str | None
+    :param boros: Only keep these boroughs. Defaults to None.
+    :type boros: list[str] | None
+    :param chunksize: Rows fetched from the cursor per batch, also the size of frames from `extract_chunks()`. Defaults to 100,000.
+    :type chunksize: int
+    :param categories: Dataset name whose stored vocabularies cast the low-cardinality text columns of `extract()` to Categoricals. Defaults to None.
+    :type categories: str | None
+    '''
+    def __init__(
+            self,
+            columns: list[str] | None = None,
+            min_date: D | str | None = None,
+            max_date: D | str | None = None,
+            boros: list[str] | None = None,
+            chunksize: int = 100_000,
+            categories: str | None = None
+        ):
+        self.table = Inspection.__table__
+        self.columns = columns or [c.name for c in self.table.columns]
+        unknown = set(self.columns) - set(self.table.columns.keys())
+        if unknown:
+            raise ValueError(f'Unknown inspection columns requested: {sorted(unknown)}')
+        self.min_date = min_date
+        self.max_date = max_date
+        self.boros = boros
+        self.chunksize = chunksize
+        self.schema = CategorySchema(categories) if categories else None
+
+    def _query(self) -> Select:
+        c = self.table.c
+        stmt = select(*(c[name] for name in self.columns))
+        if self.min_date is not None:
+            stmt = stmt.where(c.inspection_date >= self.min_date)
+        if self.max_date is not None:
+            stmt = stmt.where(c.inspection_date <= self.max_date)
+        if self.boros:
+            stmt = stmt.where(c.boro.in_(self.boros))
+        return stmt
+
+    def _to_array(self, name: str, values: Sequence) -> np.ndarray | pd.Index:
+        py_type = self.table.c[name].type.python_type
+        if py_type is int:
+            return np.fromiter(values, dtype = np.int64, count = len(values))
+        if py_type is dec:
+            return np.fromiter(values, dtype = np.float64, count = len(values)).round(5)
+        if py_type is D:
+            return pd.to_datetime(values)
+        return np.array(values, dtype = object)
+
+    def _to_frame(self, rows: Sequence[Row]) -> pd.DataFrame:
+        cols = list(zip(*rows)) if rows else [() for _ in self.columns]
+        return pd.DataFrame(
+            {name: self._to_array(name, values) for name, values in zip(self.columns, cols)},
+            columns = self.columns
+        )
+
+    def _stream(self) -> Iterator[pd.DataFrame]:
+        stmt = self._query()
+        log.debug('Streaming inspections in chunks of %d: %s', self.chunksize, stmt)
+        offset = 0
+        with get_engine().connect() as conn:
+            result = conn.execution_options(yield_per = self.chunksize).execute(stmt)
+            for rows in result.partitions():
+                df = self._to_frame(rows)
+                # Chunks are indexed by position in the full result, as if extracted in one go
+                df.index = pd.RangeIndex(offset, offset + len(df))
+                offset += len(df)
+                yield df
+
+    def extract_chunks(self) -> Iterator[pd.DataFrame]:
+        '''Yields typed DataFrames of at most `chunksize` rows straight off a server-side cursor.'''
+        for df in self._stream():
+            if self.schema is not None:
+                self.schema.apply(df)
+            yield df
 
     def extract(self) -> pd.DataFrame:
-        with self.db.get_session() as session:
-            results = session.query(Inspection).all()
+        # Categoricals are applied after the concat, chunks with different vocabularies would fall back to object
+        chunks = list(self._stream())
+        if not chunks:
+            return self._to_frame([])
+        df = pd.concat(chunks, ignore_index = True)
+        if self.schema is not None:
+            self.schema.apply(df)
+        log.info('Extracted %d inspections from the database.', len(df))
+        return df
+
 
-        self._prepare_for_pandas(results)
-        
-        self._convert_int(['camis', 'zipcode', 'score', 'census_tract'])
-        self._convert_flt(['latitude', 'longitude'])
-        self._convert_dt(['inspection_date'])
+# EOF
 
-        return self.df
\ No newline at end of file
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
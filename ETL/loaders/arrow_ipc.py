@@ -0,0 +1,44 @@
+# Import dependencies
+from pathlib import Path
+import pyarrow.feather as feather
+import pandas as pd
+import os
+import logging
+log = logging.getLogger(__name__)
+
+from ETL.etl_bin import BaseLoader
+from ETL.etl_bin.storage import dataset_path
+
+
+class SaveInspectionsArrow(BaseLoader):
+    '''Writes cleaned inspections as an uncompressed Arrow IPC (Feather v2) file, the layout that can be memory mapped.
+    The file is written to a temporary path and swapped in with `os.replace`, so readers that already mapped the
+    previous version keep a valid view while new readers pick up the new one.
+
+    :param name: File name (without suffix) under `Settings.storage`.
+    :type name: str
+    :param chunksize: Rows per record batch. Defaults to 1,000,000.
+    :type chunksize: int
+    '''
+    def __init__(self, name: str, chunksize: int = 1_000_000):
+        self.p = dataset_path(name, '.arrow')
+        self.chunksize = chunksize
+
+    def targets(self) -> list[Path]:
+        return [self.p]
+
+    def load(self, df: pd.DataFrame) -> None:
+        tmp = self.p.with_name(f'.{self.p.name}.{os.getpid()}.tmp')
+        try:
+            # Compression would force every reader to decompress into private memory
+            feather.write_feather(df, tmp, compression = 'uncompressed', chunksize = self.chunksize)
+            os.replace(tmp, self.p)
+        finally:
+            tmp.unlink(missing_ok = True)
+        log.info('Wrote %d rows to Arrow IPC file %s.', len(df), self.p)
+        return None
+
+# EOF
+
+if __name__ == '__main__':
+    print('This module is intended to be imported, not run directly.')
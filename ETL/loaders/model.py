@@ -1,33 +1,78 @@
 # Import dependencies
 
 # Scikit Helpers
-from sklearn import set_config
 from sklearn.base import clone
+import sklearn
 from sklearn.metrics import make_scorer, cohen_kappa_score
 from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import StandardScaler, OneHotEncoder, FunctionTransformer
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, OrdinalEncoder
 from sklearn.pipeline import Pipeline
 
 # Scikit/Compatible Models
-from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 - registers HalvingGridSearchCV
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, TimeSeriesSplit, StratifiedKFold
 from sklearn.linear_model import RidgeClassifier
-from sklearn.ensemble import RandomForestClassifier, StackingClassifier
+from sklearn.ensemble import RandomForestClassifier
 from mord import LogisticIT
 
 # Other major externals
 from datetime import datetime, timezone, timedelta
+from typing import Literal
+from pathlib import Path
 import pandas as pd
+import tempfile
+import shutil
 import joblib
 import json
+import logging
+log = logging.getLogger(__name__)
 
 # Bring in Custom Libraries
 from core import get_settings
 from ETL.etl_bin import BaseLoader
-from ml_lib import LGBMOrdinal, suppress_warnings, read_write_grid, full_est_scores
+from ml_lib import (
+    LGBMOrdinal, BudgetedRandomSearchCV, OOFStackingClassifier, CachedPrep, DesignCache, ThreadBudget, pooled_grid_search,
+    POOLED_SUPPORTED, suppress_warnings, read_write_grid, full_est_scores
+)
 
 
 # Loader to be called by pipeline runner
 class ModelLoader(BaseLoader):
+    '''Tunes the logistic, random forest and LightGBM families on the data before the date split, then fits and saves
+    their stacked ensemble. Every family's search is appended to `grid_log.csv` through `read_write_grid`.
+
+    :param search: `grid` tries every candidate on all rows. `halving` runs successive halving over `halving_resource`.
+        `random` samples up to `search_n_iter` candidates per family until `search_budget_s` seconds are spent. Defaults to grid.
+    :type search: Literal['grid', 'halving', 'random']
+    :param halving_resource: `n_samples` grows the training rows per round, `n_estimators` grows the trees of the forest
+        and LightGBM families (the logistic family always halves over rows). LightGBM always halves over trees, a row
+        subsample would break the time order its early stopping holdout relies on. Defaults to n_samples.
+    :type halving_resource: Literal['n_samples', 'n_estimators']
+    :param halving_factor: Share of candidates kept per round is 1 / factor, resources grow by the factor. Defaults to 3.
+    :type halving_factor: int
+    :param search_budget_s: Wall-clock seconds per model family for the random search. Defaults to 600.
+    :type search_budget_s: float
+    :param search_n_iter: Candidates sampled per model family for the random search. Defaults to 20.
+    :type search_n_iter: int
+    :param lgbm_categorical: `native` hands LightGBM integer-coded categoricals to split on directly, `onehot` gives
+        it the same one-hot matrix as the other families. Defaults to native.
+    :type lgbm_categorical: Literal['native', 'onehot']
+    :param lgbm_early_stop_rounds: LightGBM stops adding trees after this many rounds without improvement on the
+        last time-ordered fold of its training rows, the grid's `n_estimators` become upper bounds. None disables
+        early stopping. Defaults to 20.
+    :type lgbm_early_stop_rounds: int | None
+    :param cpu_budget: Cores the training may use in total. Defaults to None, every core the process may run on.
+    :type cpu_budget: int | None
+    :param inner_threads: Threads inside each search worker per family (`logit`, `randf`, `lgbm`, `stack`), the
+        family then gets `cpu_budget // threads` workers, at most `n_jobs`. Defaults to None, 1 thread each.
+    :type inner_threads: dict[str, int] | None
+    :param scheduler: `pooled` runs the fits of all three grid searches as one longest-first job queue on a single
+        pool, `sequential` runs the searches one after another. Halving and random searches are always sequential,
+        their later rounds depend on the earlier ones. Defaults to pooled.
+    :type scheduler: Literal['pooled', 'sequential']
+    '''
+    frame_attrs = ('df', 'X_tr', 'y_tr', 'X_te', 'y_te', 'all_Xy')
+
     def __init__(
             self,
             name: str,
@@ -38,9 +83,18 @@ class ModelLoader(BaseLoader):
             hard_date: datetime = None,
             tscv_n: int = 3,
             final_cv_n: int = 3,
-            n_jobs: int = -1
+            n_jobs: int = -1,
+            search: Literal['grid', 'halving', 'random'] = 'grid',
+            halving_resource: Literal['n_samples', 'n_estimators'] = 'n_samples',
+            halving_factor: int = 3,
+            search_budget_s: float = 600,
+            search_n_iter: int = 20,
+            lgbm_categorical: Literal['native', 'onehot'] = 'native',
+            lgbm_early_stop_rounds: int | None = 20,
+            cpu_budget: int | None = None,
+            inner_threads: dict[str, int] | None = None,
+            scheduler: Literal['pooled', 'sequential'] = 'pooled'
         ):
-        set_config(transform_output = 'pandas')
         self.cfg = get_settings()
         self.name = name
         if cutoff is not None:
@@ -52,11 +106,29 @@ class ModelLoader(BaseLoader):
         self.tscv_n = tscv_n
         self.final_cv_n = final_cv_n
         self.n_jobs = n_jobs
+        self.threads = ThreadBudget(cpu_budget, inner_threads, max_outer = n_jobs)
+        if scheduler not in ('pooled', 'sequential'):
+            raise ValueError(f'Unknown scheduler {scheduler!r}, expected pooled or sequential.')
+        if scheduler == 'pooled' and not POOLED_SUPPORTED:
+            log.warning('Pooled search does not support the installed scikit-learn %s, falling back to sequential.', sklearn.__version__)
+            scheduler = 'sequential'
+        self.scheduler = scheduler
+        if search not in ('grid', 'halving', 'random'):
+            raise ValueError(f'Unknown search {search!r}, expected grid, halving or random.')
+        self.search = search
+        self.halving_resource = halving_resource
+        self.halving_factor = halving_factor
+        self.search_budget_s = search_budget_s
+        self.search_n_iter = search_n_iter
+        if lgbm_categorical not in ('native', 'onehot'):
+            raise ValueError(f'Unknown lgbm_categorical {lgbm_categorical!r}, expected native or onehot.')
+        self.lgbm_categorical = lgbm_categorical
+        self.lgbm_early_stop_rounds = lgbm_early_stop_rounds
         self.numbers = numbers
         self.cycles = cycles
         self.categories = categories
         self.kappa_scorer = make_scorer(cohen_kappa_score, weights = 'quadratic')
-        self.cache = joblib.Memory('cache_dir', verbose = 0)
+        self.design_cache: DesignCache | None = None
 
 
     def split_data(self):
@@ -77,57 +149,117 @@ class ModelLoader(BaseLoader):
         return self
 
     def _mk_prep(self):
+        # High-cardinality categoricals stay one-hot CSR end to end, every family and the stack accept sparse input
         self.prep = ColumnTransformer(
             [
                 ('num', StandardScaler(), self.numbers),
                 ('cyc', 'passthrough', self.cycles),
-                ('cat', OneHotEncoder(handle_unknown = 'ignore', sparse_output = False), self.categories),
+                ('cat', OneHotEncoder(handle_unknown = 'ignore', sparse_output = True), self.categories),
             ],
+            sparse_threshold = 1.0
+        )
+        if self.lgbm_categorical == 'onehot':
+            self.lgbm_prep = self.prep
+            return None
+        # LightGBM splits the integer codes natively, unseen and missing categories become -1 which it treats as missing.
+        # Trees do not need scaled numbers
+        self.lgbm_prep = ColumnTransformer(
+            [
+                ('num', 'passthrough', self.numbers),
+                ('cyc', 'passthrough', self.cycles),
+                ('cat', OrdinalEncoder(handle_unknown = 'use_encoded_value', unknown_value = -1, encoded_missing_value = -1), self.categories),
+            ]
         )
-        self.prep.set_output(transform = 'pandas')
+        return None
+
+    def _lgbm_categorical_idx(self) -> list[int] | None:
+        if self.lgbm_categorical == 'onehot':
+            return None
+        start = len(self.numbers) + len(self.cycles)
+        return list(range(start, start + len(self.categories)))
     
     def mk_pipeline(self):
         self.pipe = Pipeline(
             [
-                ('prep', self.prep),
+                ('prep', CachedPrep(self.prep, self.design_cache)),
                 ('clf', LogisticIT())
-            ],
-            memory = self.cache
+            ]
         )
         return self
 
-    def _run_search(self, grid: dict):
-        search_grid = GridSearchCV(
-            self.pipe,
-            grid,
-            cv = TimeSeriesSplit(n_splits = self.tscv_n),
-            scoring = self.kappa_scorer,
-            n_jobs = self.n_jobs
-        )
-        search_grid.fit(self.X_tr, self.y_tr)
+    def _mk_search(self, pipe: Pipeline, grid: dict, n_jobs: int, halving_resource: str | None = None):
+        # Every search mode keeps the time-ordered folds and the quadratic kappa scorer
+        common = {
+            'cv':       TimeSeriesSplit(n_splits = self.tscv_n),
+            'scoring':  self.kappa_scorer,
+            'n_jobs':   n_jobs,
+        }
+        if self.search == 'halving':
+            grid = dict(grid)
+            resource, max_resources = 'n_samples', 'auto'
+            # The tree count becomes the resource, so it leaves the grid and its largest value is the final round's
+            if (halving_resource or self.halving_resource) == 'n_estimators' and 'clf__n_estimators' in grid and len(grid['clf']) == 1:
+                resource, max_resources = 'clf__n_estimators', max(grid.pop('clf__n_estimators'))
+                # The resource has to be a parameter of the base pipeline, not only of the candidates
+                pipe = clone(pipe).set_params(clf = clone(grid['clf'][0]))
+            return HalvingGridSearchCV(
+                pipe,
+                grid,
+                factor = self.halving_factor,
+                resource = resource,
+                max_resources = max_resources,
+                random_state = 42,
+                **common
+            )
+        if self.search == 'random':
+            return BudgetedRandomSearchCV(
+                pipe,
+                grid,
+                budget_s = self.search_budget_s,
+                n_iter = self.search_n_iter,
+                random_state = 42,
+                **common
+            )
+        return GridSearchCV(pipe, grid, **common)
+
+    @staticmethod
+    def _with_threads(grid: dict, inner: int) -> dict:
+        # Estimators with their own thread pool (RandomForest, LightGBM) get the family's inner threads
+        clfs = [clone(clf).set_params(n_jobs = inner) if 'n_jobs' in clf.get_params() else clf for clf in grid['clf']]
+        return {**grid, 'clf': clfs}
+
+    def _run_search(self, grid: dict, family: str):
+        with self.threads.limit(family) as (outer, inner):
+            search_grid = self._mk_search(self.pipe, self._with_threads(grid, inner), outer)
+            search_grid.fit(self.X_tr, self.y_tr)
         return search_grid
 
-    def _run_lgbm_search(self, grid: dict):
-        prep: ColumnTransformer = clone(self.prep)
-        prep.set_output(transform = 'pandas')
-        pipe = Pipeline(
+    def _mk_lgbm_pipeline(self) -> Pipeline:
+        # The cached prep already hands LightGBM a matrix, no conversion step needed
+        return Pipeline(
             [
-                ('prep', prep),
-                ('to_numpy', FunctionTransformer(func = pd.DataFrame.to_numpy, validate = False)),
+                ('prep', CachedPrep(clone(self.lgbm_prep), self.design_cache)),
                 ('clf', LGBMOrdinal())
-            ],
-            memory = self.cache
+            ]
         )
-        with suppress_warnings():
-            search_grid = GridSearchCV(
-                pipe,
-                grid,
-                cv = TimeSeriesSplit(n_splits = self.tscv_n),
-                scoring = self.kappa_scorer,
-                n_jobs = self.n_jobs
-            )
+
+    def _run_lgbm_search(self, grid: dict):
+        # Halving subsamples rows in random order, the early stopping holdout has to be the latest rows of a fold
+        if self.search == 'halving' and self.halving_resource == 'n_samples':
+            log.info('LightGBM halves over n_estimators rather than n_samples to keep its training rows in time order.')
+        with suppress_warnings(), self.threads.limit('lgbm') as (outer, inner):
+            search_grid = self._mk_search(self._mk_lgbm_pipeline(), self._with_threads(grid, inner), outer, 'n_estimators')
             search_grid.fit(self.X_tr, self.y_tr)
         return search_grid
+
+    def _run_pooled(self, families: dict[str, tuple[Pipeline, dict]]) -> dict[str, GridSearchCV]:
+        # One pool for all families, sized for the family asking for the most threads per worker
+        with suppress_warnings(), self.threads.limit(*families) as (outer, _):
+            searches = {
+                family: self._mk_search(pipe, self._with_threads(grid, self.threads.split(family)[1]), outer)
+                for family, (pipe, grid) in families.items()
+            }
+            return pooled_grid_search(searches, self.X_tr, self.y_tr, n_jobs = outer)
     
     def write_model(self, model: Pipeline):
         model_name = f'{self.name}.joblib'
@@ -139,7 +271,7 @@ class ModelLoader(BaseLoader):
 
         _s = model.named_steps['stack']
         meta = {
-            'model_file': model_path,
+            'model_file': str(model_path),
             'train_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'estimators': [name for name, _ in _s.estimators],
             'final_estimator': type(_s.final_estimator).__name__,
@@ -149,11 +281,33 @@ class ModelLoader(BaseLoader):
             json.dump(meta, f, indent=2)
 
 
+    def targets(self) -> list[Path]:
+        return [self.cfg.storage / f'{self.name}.joblib', self.cfg.storage / f'{self.name}_meta.json']
+
     def load(self, df: pd.DataFrame) -> None:
         self.df = df
         self.split_data()
         self._mk_prep()
-        self.mk_pipeline()
+        # Every fold is preprocessed once per run and shared by all three families and the stack.
+        # Each run gets its own directory, so concurrent runs on the same storage never clear each other's cache
+        self.cfg.storage.mkdir(parents = True, exist_ok = True)
+        self.design_cache = DesignCache(tempfile.mkdtemp(prefix = 'design_cache_', dir = self.cfg.storage))
+        try:
+            self.mk_pipeline()
+            self._fit_and_write()
+        finally:
+            log.info(
+                'Design cache: {hits}/{lookups} hits ({hit_rate:.0%}), {matrices} matrices, {mb:.1f} MB.'
+                .format(**self.design_cache.stats())
+            )
+            shutil.rmtree(self.design_cache.path, ignore_errors = True)
+        return None
+
+    def _fit_and_write(self) -> None:
+        for prep in {id(p): p for p in (self.prep, self.lgbm_prep)}.values():
+            warm = CachedPrep(prep, self.design_cache)
+            warm.warm(self.X_tr, TimeSeriesSplit(n_splits = self.tscv_n))
+            warm.warm(self.X_tr, StratifiedKFold(n_splits = self.final_cv_n), self.y_tr)
 
         # --- ordinal logistic models ---
         mord_grid = {
@@ -171,46 +325,66 @@ class ModelLoader(BaseLoader):
         }
         # --- gradient-boosting regressor + round-to-ordinal trick ---
         lgbm_grid = {
-            'clf':                          [LGBMOrdinal(random_state = 42, verbosity = -1)],
+            'clf':                          [LGBMOrdinal(
+                random_state = 42,
+                verbosity = -1,
+                categorical = self._lgbm_categorical_idx(),
+                early_stop_rounds = self.lgbm_early_stop_rounds,
+                early_stop_splits = self.tscv_n
+            )],
             'clf__n_estimators':            [100, 200],
             'clf__max_depth':               [7, 9],
             'clf__learning_rate':           [0.1],
             'clf__reg_lambda':              [0.1, 1],
         }
-        mord_search  = self._run_search( mord_grid)
-        read_write_grid(mord_search, self.all_Xy)
-        full_est_scores(mord_search, self.all_Xy)
-
-        randf_search = self._run_search(randf_grid)
-        read_write_grid(randf_search, self.all_Xy)
-        full_est_scores(randf_search, self.all_Xy)
-
-        lgbm_search  = self._run_lgbm_search(lgbm_grid)
-        read_write_grid(lgbm_search, self.all_Xy)
-        full_est_scores(lgbm_search, self.all_Xy)
-        with suppress_warnings():
+        if self.scheduler == 'pooled' and self.search == 'grid':
+            searches = self._run_pooled({
+                'logit':    (self.pipe, mord_grid),
+                'randf':    (self.pipe, randf_grid),
+                'lgbm':     (self._mk_lgbm_pipeline(), lgbm_grid),
+            })
+            mord_search, randf_search, lgbm_search = searches['logit'], searches['randf'], searches['lgbm']
+            for search_grid in searches.values():
+                read_write_grid(search_grid)
+                full_est_scores(search_grid, self.all_Xy)
+        else:
+            mord_search  = self._run_search(mord_grid, 'logit')
+            read_write_grid(mord_search)
+            full_est_scores(mord_search, self.all_Xy)
+
+            randf_search = self._run_search(randf_grid, 'randf')
+            read_write_grid(randf_search)
+            full_est_scores(randf_search, self.all_Xy)
+
+            lgbm_search  = self._run_lgbm_search(lgbm_grid)
+            read_write_grid(lgbm_search)
+            full_est_scores(lgbm_search, self.all_Xy)
+        with suppress_warnings(), self.threads.limit('stack') as (outer, inner):
+            # The searches already refit their best pipelines (prep included) on the full training set, the stack
+            # reuses them and only fits the out-of-fold models, all three families in one pool
             estimators = [
                 ('logit', mord_search.best_estimator_),
                 ('randf', randf_search.best_estimator_),
                 ('lgbm', lgbm_search.best_estimator_)
             ]
-            _stack = StackingClassifier(
+            # Their fold fits share the stack's budget instead of the thread counts of their own searches
+            for _, est in estimators:
+                if 'n_jobs' in est.named_steps['clf'].get_params():
+                    est.set_params(clf__n_jobs = inner)
+            _stack = OOFStackingClassifier(
                 estimators = estimators,
                 final_estimator = RidgeClassifier(alpha = 1.0),
                 cv = self.final_cv_n,
+                n_jobs = outer,
                 passthrough = False
             )
-            prep: ColumnTransformer = clone(self.prep)
-            prep.set_output(transform = 'pandas')
-            stack = Pipeline(
-                [
-                    ('prep', prep),
-                    ('stack', _stack),
-                ],
-                memory = self.cache
-            )
+            stack = Pipeline([('stack', _stack)])
             stack.fit(self.X_tr, self.y_tr)
 
+        # The saved model must not look for the cache directory, which is removed after the run
+        for est in stack.named_steps['stack'].estimators_:
+            est.set_params(prep__cache = None)
+
         # joblib.dump(stack, self.pipeline, compress = ('gzip', 3))
         self.write_model(stack)
         return None
\ No newline at end of file
@@ -1,37 +1,145 @@
 # Import dependencies
+from collections.abc import Iterable
+from typing import Literal
 import pandas as pd
 from sqlalchemy.dialects.postgresql import insert
+import io
+import uuid
 import logging
 log = logging.getLogger(__name__)
 
 from ETL.etl_bin import BaseLoader
-from core import Database, get_session_factory, get_settings
+from core import Database, get_engine, get_session_factory, get_settings
 from schemas import Inspection
 
 
 class InspectionsLoader(BaseLoader):
+    '''Upserts cleaned inspections into Postgres, rows hitting the natural key constraint are skipped.
 
-    def __init__(self, constraint_name: str):
+    :param constraint_name: Unique constraint used for `ON CONFLICT ... DO NOTHING`.
+    :type constraint_name: str
+    :param method: `insert` sends one multi-row INSERT through the ORM session. `copy` streams the frame with
+        `COPY ... FROM STDIN` into a temporary staging table and merges it into `inspection` with `INSERT ... SELECT`. Defaults to insert.
+    :type method: Literal['insert', 'copy']
+    :param batch_size: Rows per COPY chunk and per merge statement in copy mode. Defaults to 100,000.
+    :type batch_size: int
+    '''
+    def __init__(self, constraint_name: str, method: Literal['insert', 'copy'] = 'insert', batch_size: int = 100_000):
         log.info('Load_Inspections constructed with constraint: %s.' % constraint_name)
-        self.db = Database(get_session_factory())
+        self.db: Database | None = None
         self.cfg = get_settings()
         self.constraint = constraint_name
+        self.method = method
+        self.batch_size = batch_size
+
+        self.table = Inspection.__tablename__
+        self.columns = [c.name for c in Inspection.__table__.columns if not c.primary_key]
+        self.stats: dict[str, int] = {}
+
+    def setup(self) -> None:
+        # Building the session factory connects (and creates the database on a first run), so it waits for the run
+        self.db = Database(get_session_factory())
+        return None
 
-    def load(self, df: pd.DataFrame):
-        log.debug('Loading DataFrame of shape %s to db %s.', str(df.shape), self.cfg.db_name)
+    def _insert(self, df: pd.DataFrame) -> int:
+        if self.db is None:
+            self.setup()
         rows = df.to_dict('records')
+        with self.db.get_session() as session:
+            stmt = insert(Inspection).values(rows)
+            stmt = stmt.on_conflict_do_nothing(constraint = self.constraint)
+            result = session.execute(stmt)
+        return result.rowcount
+
+    def _copy_to_stage(self, cur, df: pd.DataFrame, stage: str) -> None:
+        cols = ', '.join(self.columns)
+        # Temp tables live in the connection's own session, so concurrent loads never share one and a crash takes it with it.
+        # Not ON COMMIT DROP because the merge commits once per batch. Serial column numbers rows in frame order for batching
+        cur.execute(f'CREATE TEMP TABLE {stage} AS SELECT {cols} FROM {self.table} WITH NO DATA')
+        cur.execute(f'ALTER TABLE {stage} ADD COLUMN stage_id BIGSERIAL')
+
+        copy_sql = f'COPY {stage} ({cols}) FROM STDIN WITH (FORMAT csv)'
+        for start in range(0, len(df), self.batch_size):
+            buf = io.StringIO()
+            df.iloc[start:start + self.batch_size][self.columns].to_csv(
+                buf, header = False, index = False, date_format = '%Y-%m-%d'
+            )
+            buf.seek(0)
+            cur.copy_expert(copy_sql, buf)
+        return None
+
+    def _merge_from_stage(self, conn, cur, n_rows: int, stage: str) -> int:
+        cols = ', '.join(self.columns)
+        merge_sql = (
+            f'INSERT INTO {self.table} ({cols}) '
+            f'SELECT {cols} FROM {stage} WHERE stage_id > %s AND stage_id <= %s ORDER BY stage_id '
+            f'ON CONFLICT ON CONSTRAINT {self.constraint} DO NOTHING'
+        )
+        inserted = 0
+        for start in range(0, n_rows, self.batch_size):
+            cur.execute(merge_sql, (start, start + self.batch_size))
+            inserted += cur.rowcount
+            conn.commit()
+            log.debug('Merged staged rows %d-%d, %d inserted so far.', start, min(start + self.batch_size, n_rows), inserted)
+        return inserted
+
+    def _drop_stage(self, conn, stage: str) -> None:
+        # Best effort clean up after a failure, the original error is the one worth raising
         try:
-            with self.db.get_session() as session:
-                stmt = insert(Inspection).values(rows)
-                stmt = stmt.on_conflict_do_nothing(constraint = self.constraint)
-                session.execute(stmt)
-            log.info('Loading to Inspections table successful!')
+            with conn.cursor() as cur:
+                cur.execute(f'DROP TABLE IF EXISTS {stage}')
+            conn.commit()
         except Exception:
-            log.critical('Could not data into postgres. Critical failure, exiting early.')
+            log.warning('Could not drop staging table %s.', stage)
+        return None
+
+    def _copy(self, df: pd.DataFrame) -> int:
+        # Unique name as well, a pooled connection may still hold the stage of a load whose clean up failed
+        stage = f'{self.table}_stage_{uuid.uuid4().hex}'
+        conn = get_engine().raw_connection()
+        try:
+            with conn.cursor() as cur:
+                self._copy_to_stage(cur, df, stage)
+                conn.commit()
+                inserted = self._merge_from_stage(conn, cur, len(df), stage)
+                cur.execute(f'DROP TABLE {stage}')
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            self._drop_stage(conn, stage)
+            raise
         finally:
+            conn.close()
+        return inserted
+
+    def load(self, df: pd.DataFrame) -> None:
+        # An INSERT without rows is invalid SQL, an empty delta simply has nothing to load
+        if df.empty:
+            self.stats = {'rows': 0, 'inserted': 0, 'skipped': 0}
+            log.info('Nothing to load into Inspections table, DataFrame is empty.')
             return None
+        log.debug('Loading DataFrame of shape %s to db %s using %s.', str(df.shape), self.cfg.db_name, self.method)
+        try:
+            inserted = self._copy(df) if self.method == 'copy' else self._insert(df)
+        except Exception:
+            log.critical('Could not load data into postgres. Critical failure, exiting early.')
+            raise
+
+        self.stats = {'rows': len(df), 'inserted': inserted, 'skipped': len(df) - inserted}
+        log.info('Loading to Inspections table successful! %d rows inserted, %d skipped as duplicates.', inserted, len(df) - inserted)
+        return None
+
+    def load_chunks(self, chunks: Iterable[pd.DataFrame]) -> None:
+        # The upsert is idempotent per row, so every chunk can be merged on its own
+        totals = {'rows': 0, 'inserted': 0, 'skipped': 0}
+        for df in chunks:
+            self.load(df)
+            totals = {k: v + self.stats[k] for k, v in totals.items()}
+        self.stats = totals
+        log.info('Streamed %d rows to Inspections table, %d inserted, %d skipped.', totals['rows'], totals['inserted'], totals['skipped'])
+        return None
 
 # EOF
 
 if __name__ == '__main__':
-    print('This module is intended to be imported, not run directly.')
\ No newline at end of file
+    print('This module is intended to be imported, not run directly.')
@@ -1,4 +1,6 @@
 # Import dependencies
+from collections.abc import Iterable
+from pathlib import Path
 import pandas as pd
 import logging
 log = logging.getLogger(__name__)
@@ -12,10 +14,22 @@ class SaveInspectionsCSV(BaseLoader):
         self.cfg = get_settings()
         self.p = self.cfg.storage / f'{name}.csv'
 
+    def targets(self) -> list[Path]:
+        return [self.p]
+
     def load(self, df: pd.DataFrame) -> None:
         df.to_csv(self.p, header = True, index = False)
         return None
 
+    def load_chunks(self, chunks: Iterable[pd.DataFrame]) -> None:
+        # First chunk rewrites the file with a header, the rest append
+        n_rows = 0
+        for i, df in enumerate(chunks):
+            df.to_csv(self.p, header = (i == 0), index = False, mode = 'w' if i == 0 else 'a')
+            n_rows += len(df)
+        log.info('Streamed %d rows to %s.', n_rows, self.p)
+        return None
+
 # EOF
 
 if __name__ == '__main__':
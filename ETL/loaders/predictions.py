@@ -1,5 +1,7 @@
 # Import dependencies
-from sklearn.pipeline import Pipeline
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from pathlib import Path
 import pandas as pd
 import joblib
 import json
@@ -8,15 +10,40 @@ log = logging.getLogger(__name__)
 
 # Abstract class to de-couple extraction classes from Pipeline
 from ETL.etl_bin import BaseLoader
+from ETL.etl_bin.checkpoints import file_digest
 from core import get_settings
-from ml_lib import LGBMOrdinal
+
+# Only needed for the annotation, unpickling the model imports sklearn and ml_lib.lgbm by itself
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+@lru_cache(maxsize = 2)
+def _load_model(path: str, mtime_ns: int) -> 'Pipeline':
+    # Keyed by modification time, so a long-lived process keeps the model warm until it is retrained
+    log.info('Loading in serialized pipeline.')
+    return joblib.load(path)
+
 
 class MakePredictions(BaseLoader):
+    frame_attrs = ('df', 'preds', 'probs')
+
     def __init__(self, name: str):
-        log.info('Loading in serialized pipeline.')
         self.cfg = get_settings()
-        pipe_path = self.cfg.storage / f'{name}.joblib'
-        self.model: Pipeline = joblib.load(pipe_path)
+        self.pipe_path = self.cfg.storage / f'{name}.joblib'
+        self.model: 'Pipeline | None' = None
+
+    def setup(self) -> None:
+        # Every frame of the run is predicted with the same model
+        self.model = _load_model(str(self.pipe_path), self.pipe_path.stat().st_mtime_ns)
+        return None
+
+    def teardown(self) -> None:
+        self.model = None
+        return None
+
+    def fingerprint(self) -> str:
+        # A retrained model has to produce new predictions even when the input frame is unchanged
+        return file_digest(self.pipe_path)
 
 
     def _predictions(self):
@@ -40,8 +67,14 @@ class MakePredictions(BaseLoader):
         log.info(f'Wrote {len(output)} predictions to predictions.json')
 
 
+    def targets(self) -> list[Path]:
+        # Written to the working directory, like _build_json does
+        return [Path('predictions.json')]
+
     def load(self, df: pd.DataFrame) -> None:
         log.info('Starting model load.')
+        if self.model is None:
+            self.setup()
         self.df = df
         self._predictions()
         self._build_json()
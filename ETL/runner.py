@@ -1,14 +1,97 @@
 # Import dependencies
-from typing import overload, Literal
+from typing import TYPE_CHECKING, overload, Literal, Any
+from collections.abc import Callable, Iterator, Iterable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import AbstractContextManager, nullcontext
 from importlib import import_module
+from threading import Thread, Lock
+from queue import Queue, Full
+import multiprocessing
+import json
+import time
 
 # Allow logging from top-level
 import logging
 log = logging.getLogger(__name__)
 
 # Custom libraries
-from core import log_exceptions
-from ETL.etl_bin import BaseExtractor, BaseTransformer, BaseLoader, YamlComponents, YamlPipelines, YamlETL
+from core import log_exceptions, log_setup, get_settings
+from ETL.etl_bin import BaseExtractor, BaseTransformer, BaseLoader, YamlComponents, YamlPipelines, YamlTasks, YamlETL, ArtifactStore, StageTimer, RunReport, stage_key, concat_chunks
+from ETL.etl_bin.checkpoints import Checkpoints, digest, code_digest, frame_digest
+from ETL.etl_bin.profiling import Profiler
+from ETL.etl_bin.dag import critical_path
+
+# Frames are only passed through here, pandas comes in with the first component that builds one
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Base class per component type, used to tell whether a component brings its own fingerprint
+_BASES = {'extractors': BaseExtractor, 'transformers': BaseTransformer, 'loaders': BaseLoader}
+
+# Queue markers used to close out loader threads in streaming mode
+_DONE = object()
+_ABORT = object()
+
+
+class PipelineError(RuntimeError):
+    '''Raised once every component of a concurrent stage has finished and at least one of them failed.
+    Tasks raise it with stage `task`, keyed by pipeline name, once their running pipelines have finished.
+
+    :param stage: Stage that failed, `extract`, `load` or `task`.
+    :type stage: str
+    :param errors: Exceptions keyed by component (or pipeline) name, in pipeline order.
+    :type errors: dict[str, BaseException]
+    '''
+    def __init__(self, stage: str, errors: dict[str, BaseException]):
+        self.stage = stage
+        self.errors = errors
+        detail = '; '.join(f'{key}: {err!r}' for key, err in errors.items())
+        super().__init__(f'{len(errors)} component(s) failed during {stage}: {detail}')
+
+    def __reduce__(self):
+        # Pipelines run in process pool workers raise it back to the parent, which rebuilds it from stage and errors
+        return type(self), (self.stage, self.errors), self.__dict__
+
+
+def _worker_init(log_config: bool) -> None:
+    # Forkserver workers start from a fresh interpreter, logging is set up again when the parent had set it up
+    if log_config:
+        log_setup(get_settings())
+    return None
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    '''Process pool whose workers are forked from a clean forkserver (spawned where there is none) rather than from
+    this process, so they never inherit its threads, locks held by them or open DB connections.'''
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(
+        max_workers = workers,
+        mp_context = multiprocessing.get_context(method),
+        initializer = _worker_init,
+        initargs = (bool(logging.getLogger().handlers),)
+    )
+
+
+def _drain(q: Queue) -> 'Iterator[pd.DataFrame]':
+    '''Yields chunks off a bounded queue until the producer finishes, raising if it gave up part way.'''
+    while True:
+        item = q.get()
+        if item is _DONE:
+            return None
+        if item is _ABORT:
+            raise RuntimeError('Upstream stage failed, abandoning streamed load.')
+        yield item
+
+
+def _put(q: Queue, item: object, consumer: Thread) -> None:
+    '''Blocking put that gives up once the consuming thread has died, so a failed loader cannot stall the stream.'''
+    while consumer.is_alive():
+        try:
+            q.put(item, timeout = 0.5)
+            return None
+        except Full:
+            continue
+    return None
 
 
 class TaskRunner:
@@ -25,6 +108,36 @@ class TaskRunner:
     '''
     def __init__(self, etl_cfg_path: str):
         self.etl_cfg = YamlETL.from_yaml(etl_cfg_path)
+        self.store: ArtifactStore | None = None
+        self.checkpoints: Checkpoints | None = None
+        self.report: RunReport | None = None
+        self.profiler: Profiler | None = None
+        self._pipeline: str | None = None
+        self._init_instances()
+
+    def _init_instances(self, in_worker: bool = False) -> None:
+        # Per-run component cache, keyed by (component type, name) and filled by _make
+        self._instances: dict[tuple[str, str], BaseExtractor | BaseTransformer | BaseLoader] = {}
+        self._ready: list[tuple[str, str]] = []
+        self._locks: dict[tuple[str, str], Lock] = {}
+        self._lock = Lock()
+        self._in_worker = in_worker
+        return None
+
+    def __getstate__(self) -> dict:
+        # Process pool workers get the config and checkpoint settings, never the in-memory artifacts or live components
+        state = {k: v for k, v in self.__dict__.items() if k not in ('_instances', '_ready', '_locks', '_lock')}
+        state['store'] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._init_instances(in_worker = True)
+        return None
+
+    def _resolve(self, comp_cfg: YamlComponents) -> type:
+        module_name, cls_name = comp_cfg.class_name.rsplit('.', 1)
+        return getattr(import_module(module_name), cls_name)
     
     # Type checks implementation for each component type and its corresponding base ETL part
     @overload
@@ -36,7 +149,8 @@ class TaskRunner:
 
     # Actual function definition with all variations
     def _make(self, component_type: Literal['extractors', 'transformers', 'loaders'], name: str) -> BaseExtractor | BaseTransformer | BaseLoader:
-        '''Constructs an instance of a designated class with loaded parameters from the pipeline.yml.
+        '''Returns the run's instance of a designated class with loaded parameters from the pipeline.yml, set up and ready to use.
+        The first call constructs it and runs its `setup()`, later calls in the same run reuse it.
 
         :param component_type: Specific section of pipeline building blocks.
         :type component_type: Literal[&#39;extractors&#39;, &#39;transformers&#39;, &#39;loaders&#39;]
@@ -46,12 +160,374 @@ class TaskRunner:
         :returns: Always returns one of three base ETL object classes, linked to real classes in the ETL/ files.
         :rtype: BaseExtractor or BaseTransformer or BaseLoader
         '''
-        # Gets the actual class specified by the YAML for pipeline and construct with paramaters
+        key = (component_type, name)
+        instance = self._instance(component_type, name)
+        if key in self._ready:
+            return instance
+        with self._key_lock(key):
+            if key not in self._ready:
+                log.debug('Setting up %s %s.', component_type, name)
+                instance.setup()
+                self._ready.append(key)
+        return instance
+
+    def _key_lock(self, key: tuple[str, str]) -> Lock:
+        # One lock per component, so concurrent stages only wait on each other when they need the same one
+        with self._lock:
+            return self._locks.setdefault(key, Lock())
+
+    def _instance(self, component_type: Literal['extractors', 'transformers', 'loaders'], name: str) -> BaseExtractor | BaseTransformer | BaseLoader:
+        '''Constructed but not necessarily set up instance, enough for `fingerprint()`.'''
+        key = (component_type, name)
+        with self._key_lock(key):
+            if key not in self._instances:
+                # Gets the actual class specified by the YAML for pipeline and construct with paramaters
+                comp_cfg: YamlComponents = getattr(self.etl_cfg, component_type)[name]
+                Impl = self._resolve(comp_cfg)
+                log.debug('Crafting import %s.', comp_cfg.class_name)
+                self._instances[key] = Impl(**(comp_cfg.params or {}))
+        return self._instances[key]
+
+    def _teardown(self) -> None:
+        '''Tears set up components down in reverse order and empties the cache. A failing teardown is logged, not raised.'''
+        for key in reversed(self._ready):
+            try:
+                self._instances[key].teardown()
+            except Exception:
+                log.exception('Teardown of %s %s failed.', *key)
+        self._init_instances(self._in_worker)
+        return None
+
+    def _call(self, component_type: Literal['extractors', 'transformers', 'loaders'], name: str, method: str, *args: Any) -> Any:
+        '''Calls `method` on the run's instance of a component, then lets it drop the frames it kept on itself.'''
+        component = self._make(component_type, name)
+        try:
+            return getattr(component, method)(*args)
+        finally:
+            component.release()
+
+    def _release(self, component_type: Literal['extractors', 'transformers', 'loaders'], names: Iterable[str]) -> None:
+        # Cached instances outlive their stage, frames they kept on themselves would otherwise stay alive with them
+        for name in names:
+            if (component_type, name) in self._instances:
+                self._instances[(component_type, name)].release()
+        return None
+
+    def _job_done(self) -> None:
+        # Process pool workers get a fresh copy of the runner per job, their components end with the job
+        if self._in_worker:
+            self._teardown()
+        return None
+
+    def _fingerprint(self, component_type: Literal['extractors', 'transformers', 'loaders'], name: str) -> tuple[str, str | None]:
+        '''Fingerprints a component for checkpoint keys.
+
+        :returns: Digest of class, params and code version, and the component's own `fingerprint()` (None if it has none).
+        :rtype: tuple[str, str | None]
+        '''
         comp_cfg: YamlComponents = getattr(self.etl_cfg, component_type)[name]
-        module_name, cls_name = comp_cfg.class_name.rsplit('.', 1)
-        Impl = getattr(import_module(module_name), cls_name)
-        log.debug('Crafting import %s.%s.', module_name, cls_name)
-        return Impl(**(comp_cfg.params or {}))
+        Impl = self._resolve(comp_cfg)
+        params = json.dumps(comp_cfg.params or {}, sort_keys = True, default = str)
+        static = digest(comp_cfg.class_name, params, code_digest(Impl))
+        # Only built when the class overrides fingerprint(), and never set up for it
+        own = None
+        if Impl.fingerprint is not _BASES[component_type].fingerprint:
+            own = self._instance(component_type, name).fingerprint()
+        return static, own
+
+    def _record(self, record: dict) -> None:
+        if self.report is not None:
+            self.report.add(self._pipeline, record)
+        return None
+
+    def _profiled(self, stage: str, key: str) -> AbstractContextManager:
+        return self.profiler.profile(stage, key) if self.profiler is not None else nullcontext()
+
+    # Pool jobs return their stage record next to the result, the report itself only lives in the parent process
+    def _extract(self, key: str) -> 'tuple[pd.DataFrame, dict]':
+        try:
+            with StageTimer('extract', key) as t:
+                with self._profiled('extract', key):
+                    df = self._call('extractors', key, 'extract')
+                t.output(df)
+        finally:
+            self._job_done()
+        return df, t.record
+
+    def _transform(self, df: 'pd.DataFrame', keys: list[str], extractor: str, start: int = 0, ckpt_keys: list[str] | None = None) -> 'pd.DataFrame':
+        # Starts part way through the chain when an earlier pipeline or checkpoint already covers a prefix of it
+        for i in range(start, len(keys)):
+            with StageTimer('transform', keys[i], df, sink = self._record) as t:
+                with self._profiled('transform', keys[i]):
+                    df = self._call('transformers', keys[i], 'transform', df)
+                t.output(df)
+            self._keep(df, extractor, keys[:i + 1])
+            if ckpt_keys is not None:
+                self.checkpoints.save_frame(ckpt_keys[i + 1], df, stage_key(extractor, keys[:i + 1]))
+        return df
+
+    def _artifact_root(self, extractor: str) -> str:
+        # Artifacts are keyed by the source's fingerprint as well, so a pipeline that rewrote the source earlier in the
+        # task never gets the frame of the old one. Extractors without a fingerprint are taken to be stable within a task
+        _, own = self._fingerprint('extractors', extractor)
+        return extractor if own is None else f'{extractor}@{digest(own)[:16]}'
+
+    def _keep(self, df: 'pd.DataFrame', extractor: str, transformers: list[str]) -> None:
+        if self.store is not None and self.store.wants(extractor, transformers):
+            self.store.put(stage_key(self._artifact_root(extractor), transformers), df)
+        return None
+
+    def _load(self, key: str, dfs: 'list[pd.DataFrame]', mark: str | None = None, chain: str | None = None) -> tuple[None, dict]:
+        # One loader takes every frame in order, so loaders that overwrite their target stay deterministic.
+        # The loaders of a pipeline run side by side on the same frames, each gets its own shallow copy so adding,
+        # dropping or renaming columns or rows stays private to it. Values are shared, loaders must not edit them in place
+        try:
+            with StageTimer('load', key, dfs) as t:
+                with self._profiled('load', key):
+                    for df in dfs:
+                        self._call('loaders', key, 'load', df.copy(deep = False))
+        finally:
+            self._job_done()
+        if mark is not None:
+            self.checkpoints.mark_done(mark, key, chain, self._make('loaders', key).targets())
+        return None, t.record
+
+    def _commit(self, frames: 'dict[str, pd.DataFrame | None]') -> None:
+        # Only reached once every loader succeeded, so extractors never advance past rows that were not loaded.
+        # Extractors without a commit() of their own are skipped, a process pool run would otherwise set them up here
+        for key, df in frames.items():
+            if self._resolve(self.etl_cfg.extractors[key]).commit is not BaseExtractor.commit:
+                self._make('extractors', key).commit(df)
+        return None
+
+    def _lookup(self, extractor: str, transformers: list[str]) -> 'tuple[int, pd.DataFrame | None]':
+        if self.store is None:
+            return -1, None
+        return self.store.lookup(self._artifact_root(extractor), transformers)
+
+    def _executor(self, pipe: YamlPipelines, n_jobs: int) -> Executor:
+        workers = min(pipe.max_workers, n_jobs)
+        if pipe.executor == 'process':
+            return _process_pool(workers)
+        return ThreadPoolExecutor(max_workers = workers, thread_name_prefix = 'etl')
+
+    def _run_stage(self, pipe: YamlPipelines, stage: str, fn: Callable[..., Any], jobs: dict[str, tuple]) -> list[Any]:
+        '''Runs one job per component, concurrently when the pipeline allows more than one worker.
+        Every job runs to completion before any error is raised, so one bad source does not cancel the others.
+
+        :param pipe: Pipeline config holding `max_workers` and `executor`.
+        :type pipe: YamlPipelines
+        :param stage: Stage name used in logs and errors.
+        :type stage: str
+        :param fn: Callable run per component returning its result and stage record, must be picklable for the process executor.
+        :type fn: Callable[..., Any]
+        :param jobs: Arguments for `fn` keyed by component name, in pipeline order.
+        :type jobs: dict[str, tuple]
+
+        :returns: Results in the order of `jobs`, whatever order they finished in.
+        :rtype: list[Any]
+        '''
+        results: dict[str, Any] = {}
+        errors: dict[str, BaseException] = {}
+
+        # Profilers only see the thread they run on, so profiled runs stay on the main thread
+        if pipe.max_workers <= 1 or len(jobs) <= 1 or self.profiler is not None:
+            for key, args in jobs.items():
+                try:
+                    results[key], record = fn(*args)
+                    self._record(record)
+                except Exception as e:
+                    errors[key] = e
+                    self._record(getattr(e, 'stage_record', {'stage': stage, 'component': key, 'status': 'failed', 'error': repr(e)}))
+        else:
+            log.info('Running %d %s jobs on up to %d %s workers.', len(jobs), stage, pipe.max_workers, pipe.executor)
+            with self._executor(pipe, len(jobs)) as pool:
+                futures: dict[str, Future] = {key: pool.submit(fn, *args) for key, args in jobs.items()}
+                for key, fut in futures.items():
+                    try:
+                        results[key], record = fut.result()
+                        self._record(record)
+                    except Exception as e:
+                        errors[key] = e
+                        self._record(getattr(e, 'stage_record', {'stage': stage, 'component': key, 'status': 'failed', 'error': repr(e)}))
+
+        for key, err in errors.items():
+            log.error('%s of %s failed: %r', stage.capitalize(), key, err)
+        if errors:
+            raise PipelineError(stage, errors)
+        return [results[key] for key in jobs]
+
+    def _chain_keys(self, root: str, start: int, transformers: list[str]) -> list[str | None]:
+        # keys[i] identifies the frame after the first i transformers, chained so no data is needed to compute them
+        keys: list[str | None] = [None] * start + [root]
+        for key in transformers[start:]:
+            keys.append(digest(keys[-1], *map(str, self._fingerprint('transformers', key))))
+        return keys
+
+    def _plan_chain(self, pipe: YamlPipelines, extractor: str, keys: list[str | None], start: int) -> tuple[int | None, dict[str, str]]:
+        '''Works out what a checkpointed chain still has to do.
+
+        :returns: Position of the furthest usable transformer checkpoint (None if there is none), and a checkpoint
+            marker per loader that still has to run.
+        :rtype: tuple[int | None, dict[str, str]]
+        '''
+        ckpt = self.checkpoints
+        names = [extractor, *pipe.transformers]
+        pending = {}
+        for key in pipe.loaders:
+            mark = digest(keys[-1], *map(str, self._fingerprint('loaders', key)))
+            if ckpt.forced(names + [key]) or not ckpt.is_done(mark):
+                pending[key] = mark
+
+        resume = next(
+            (i for i in range(len(pipe.transformers), start, -1) if not ckpt.forced(names[:i + 1]) and ckpt.has_frame(keys[i])),
+            None
+        )
+        return resume, pending
+
+    def _run_checkpointed(self, pipe: YamlPipelines) -> None:
+        '''Batch run where every stage is keyed by its upstream key, its class and params and its code version.
+        Extractors that fingerprint their source root the chain without being run, the others are run and keyed by
+        the hash of what they returned. Transformer outputs are saved as they complete so a crashed run resumes from
+        the last good stage, and loaders that already loaded an identical input are skipped.
+        '''
+        ckpt = self.checkpoints
+        n = len(pipe.transformers)
+        chains: dict[str, tuple[int, pd.DataFrame | None, str | None]] = {}
+        for key in pipe.extractors:
+            start, df = self._lookup(key, pipe.transformers)
+            static, own = self._fingerprint('extractors', key)
+            # Forced chains keep their fingerprint root, they are still extracted as none of their stages may be reused,
+            # and their outputs replace the checkpoints an unforced run looks up instead of a parallel set keyed by content
+            root = digest(static, own) if df is None and own is not None else None
+            chains[key] = (start, df, root)
+
+        # Chains rooted by fingerprint can be planned before anything is extracted
+        plans = {}
+        for key, (start, df, root) in chains.items():
+            if root is not None:
+                keys = self._chain_keys(root, 0, pipe.transformers)
+                plans[key] = (keys, *self._plan_chain(pipe, key, keys, 0))
+        pending = [
+            key for key, (_, df, root) in chains.items()
+            if df is None and (root is None or (plans[key][2] and plans[key][1] is None))
+        ]
+        extracted = dict(zip(pending, self._run_stage(pipe, 'extract', self._extract, {key: (key,) for key in pending})))
+
+        for key, (start, df, root) in chains.items():
+            if key in extracted:
+                start, df = 0, extracted[key]
+                self._keep(df, key, [])
+            start = max(start, 0)
+            if key not in plans:
+                # Stored or freshly extracted frames without a source fingerprint are keyed by their content
+                root = digest(stage_key(key, pipe.transformers[:start]), frame_digest(df))
+                keys = self._chain_keys(root, start, pipe.transformers)
+                plans[key] = (keys, *self._plan_chain(pipe, key, keys, start))
+            keys, resume, loaders = plans[key]
+
+            if not loaders:
+                log.info('Chain %s is unchanged since its last load, skipping.', stage_key(key, pipe.transformers))
+            else:
+                if resume is not None and resume > start:
+                    start, df = resume, ckpt.load_frame(keys[resume])
+                df = self._transform(df, pipe.transformers, key, start, keys)
+                chain = stage_key(key, pipe.transformers)
+                self._run_stage(pipe, 'load', self._load, {name: (name, [df], mark, chain) for name, mark in loaders.items()})
+            if key in extracted:
+                self._commit({key: extracted[key]})
+        return None
+
+    def _stream_transform(self, chunks: 'Iterable[pd.DataFrame]', keys: list[str]) -> 'Iterator[pd.DataFrame]':
+        '''Applies row-local transformers chunk by chunk. From the first transformer that needs the full frame
+        onwards, the chunks are concatenated and the rest of the chain runs once.
+        '''
+        transformers = [self._make('transformers', key) for key in keys]
+        split = next((i for i, t in enumerate(transformers) if t.needs_full_frame), len(transformers))
+
+        def per_chunk() -> 'Iterator[pd.DataFrame]':
+            for df in chunks:
+                for t in transformers[:split]:
+                    df = t.transform(df)
+                yield df
+
+        if split == len(transformers):
+            yield from per_chunk()
+            return None
+
+        log.info('Materializing stream before transformer %s.', keys[split])
+        frames = list(per_chunk())
+        if frames:
+            df = concat_chunks(frames)
+        else:
+            import pandas as pd
+            df = pd.DataFrame()
+        for t in transformers[split:]:
+            df = t.transform(df)
+        yield df
+
+    def _stream_load(self, chunks: 'Iterable[pd.DataFrame]', keys: list[str], queue_size: int) -> None:
+        '''Feeds chunks to every loader. With several loaders each one consumes a bounded queue on its own thread,
+        so the slowest loader applies backpressure to extraction instead of chunks piling up in memory.
+        '''
+        loaders = [self._make('loaders', key) for key in keys]
+        if len(loaders) == 1:
+            loaders[0].load_chunks(chunks)
+            return None
+
+        queues = [Queue(maxsize = queue_size) for _ in loaders]
+        errors: dict[str, BaseException] = {}
+
+        def consume(key: str, loader: BaseLoader, q: Queue) -> None:
+            try:
+                loader.load_chunks(_drain(q))
+            except BaseException as e:
+                errors[key] = e
+
+        threads = [Thread(target = consume, args = args, name = f'loader-{args[0]}') for args in zip(keys, loaders, queues)]
+        for t in threads:
+            t.start()
+
+        end = _ABORT
+        try:
+            for df in chunks:
+                # Shallow copy per loader thread, as in _load
+                for q, t in zip(queues, threads):
+                    _put(q, df.copy(deep = False), t)
+            end = _DONE
+        finally:
+            for q, t in zip(queues, threads):
+                _put(q, end, t)
+            for t in threads:
+                t.join()
+
+        if errors:
+            raise PipelineError('load', {key: errors[key] for key in keys if key in errors})
+        return None
+
+    def _stream_pipeline(self, pipe: YamlPipelines) -> None:
+        # Stages overlap in a stream, so each extractor's whole stream is measured as one record
+        for key in pipe.extractors:
+            rows = 0
+
+            def counted(chunks: 'Iterable[pd.DataFrame]') -> 'Iterator[pd.DataFrame]':
+                nonlocal rows
+                for df in chunks:
+                    rows += len(df)
+                    yield df
+
+            try:
+                with StageTimer('stream', key, sink = self._record) as t, self._profiled('stream', key):
+                    chunks = counted(self._make('extractors', key).extract_chunks())
+                    chunks = self._stream_transform(chunks, pipe.transformers)
+                    self._stream_load(chunks, pipe.loaders, pipe.queue_size)
+                    t.record['rows_in'] = rows
+            finally:
+                self._release('extractors', [key])
+                self._release('transformers', pipe.transformers)
+                self._release('loaders', pipe.loaders)
+            self._commit({key: None})
+        return None
 
     # Execution for pipeline begins and ends here
     def _run_single_pipeline(self, pipeline: str) -> None:
@@ -67,42 +543,222 @@ class TaskRunner:
         '''
         # Log pipeline start
         log.info('Pipeline %s started.', pipeline)
+        self._pipeline = pipeline
 
         # Get selected pipeline from YAML
         pipe: YamlPipelines = self.etl_cfg.pipelines[pipeline]
 
-        # Extract all sources
-        dfs = [self._make('extractors', key).extract() for key in pipe.extractors]
+        # Streaming pipelines hand chunks from extractor to loaders instead of whole frames
+        if pipe.streaming:
+            self._stream_pipeline(pipe)
+            log.info('Pipeline %s completed (streamed).', pipeline)
+            return None
+
+        # Checkpointed pipelines skip or resume stages whose inputs are unchanged
+        if pipe.checkpoint and self.checkpoints is not None:
+            self._run_checkpointed(pipe)
+            log.info('Pipeline %s completed (checkpointed).', pipeline)
+            return None
+
+        # Frames kept by earlier pipelines of the task skip extraction and the transformers already applied to them
+        stored = {key: self._lookup(key, pipe.transformers) for key in pipe.extractors}
+        pending = [key for key, (start, _) in stored.items() if start < 0]
+
+        # Extract remaining sources, concurrently if the pipeline allows it
+        extracted = dict(zip(pending, self._run_stage(pipe, 'extract', self._extract, {key: (key,) for key in pending})))
 
         # Transform all extractions
-        for i, df in enumerate(dfs):
-            for key in pipe.transformers:
-                df = self._make('transformers', key).transform(df)
-            dfs[i] = df
-
-        # Load cleaned data
-        for df in dfs:
-            for key in pipe.loaders:
-                self._make('loaders', key).load(df)
-        
+        dfs = []
+        for key in pipe.extractors:
+            start, df = stored[key]
+            if start < 0:
+                start, df = 0, extracted[key]
+                self._keep(df, key, [])
+            dfs.append(self._transform(df, pipe.transformers, key, start))
+
+        # Fan the cleaned frames out to every loader
+        self._run_stage(pipe, 'load', self._load, {key: (key, dfs) for key in pipe.loaders})
+        self._commit({key: extracted[key] for key in pending})
+
         # Log task finish
         log.info('Pipeline %s completed.', pipeline)
 
         return None
 
+    def _timed_pipeline(self, pipeline: str) -> float:
+        start = time.perf_counter()
+        self._run_single_pipeline(pipeline)
+        return time.perf_counter() - start
+
+    def _pipeline_job(self, pipeline: str) -> tuple[list[dict], float]:
+        '''Runs one pipeline of a task in a process pool worker.
+        The worker keeps its components for the whole pipeline and appends its stage records to the shared report file,
+        the records also travel back (on the exception when the pipeline fails) so the parent's summary stays complete.
+
+        :returns: Stage records of the pipeline and its wall time in seconds.
+        :rtype: tuple[list[dict], float]
+        '''
+        self._in_worker = False
+        self.report.records = []
+        try:
+            return self.report.records, self._timed_pipeline(pipeline)
+        except Exception as e:
+            e.run_records = self.report.records
+            raise
+        finally:
+            self._teardown()
+
+    def _run_chain(self, task: YamlTasks) -> None:
+        '''Runs a task without `depends` in the parent process, one pipeline after another in the listed order.
+        Every pipeline waits for the one before it, so the first failure skips the rest whatever `on_failure` says.'''
+        for i, name in enumerate(task.pipelines):
+            try:
+                self._timed_pipeline(name)
+            except Exception as e:
+                rest = task.pipelines[i + 1:]
+                if rest:
+                    log.warning('Pipeline(s) %s skipped after failed pipeline %s.', ', '.join(rest), name)
+                log.error('Pipeline %s failed: %r', name, e)
+                raise PipelineError('task', {name: e}) from e
+        return None
+
+    def _run_task(self, task: YamlTasks) -> None:
+        '''Runs the pipelines of a task as their dependencies allow. Independent pipelines run at the same time in a process
+        pool of `task.max_workers`, a pipeline that is the only one able to run goes inline so it still shares the task's
+        artifact store. With `fail_fast` no new pipeline starts after a failure, with `continue` only the dependents of a
+        failed pipeline are skipped. Either way running pipelines finish before the errors are raised.
+        '''
+        if task.depends is None:
+            self._run_chain(task)
+            return None
+
+        upstream = task.upstream()
+        durations: dict[str, float] = {}
+        errors: dict[str, BaseException] = {}
+        skipped: list[str] = []
+        waiting = list(task.pipelines)
+        running: dict[Future, str] = {}
+        start = time.perf_counter()
+
+        # Profilers only see their own process, so profiled tasks run one pipeline at a time
+        workers = min(task.max_workers, len(task.pipelines)) if self.profiler is None else 1
+        pool = _process_pool(workers) if workers > 1 else None
+        try:
+            while waiting or running:
+                stop = errors and task.on_failure == 'fail_fast'
+                for name in [p for p in waiting if stop or any(u in errors or u in skipped for u in upstream[p])]:
+                    log.warning('Pipeline %s skipped after failed pipeline(s): %s.', name, ', '.join(errors))
+                    waiting.remove(name)
+                    skipped.append(name)
+                ready = [p for p in waiting if all(u in durations for u in upstream[p])]
+
+                if ready and (pool is None or (not running and len(ready) == 1)):
+                    name = ready[0]
+                    waiting.remove(name)
+                    try:
+                        durations[name] = self._timed_pipeline(name)
+                    except Exception as e:
+                        errors[name] = e
+                    continue
+
+                # Pipelines only leave `waiting` once a worker is free, so fail_fast can still hold back the rest
+                for name in ready[:workers - len(running)]:
+                    log.info('Pipeline %s submitted to the task pool.', name)
+                    running[pool.submit(self._pipeline_job, name)] = name
+                    waiting.remove(name)
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when = FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    try:
+                        records, durations[name] = fut.result()
+                    except Exception as e:
+                        errors[name] = e
+                        records = getattr(e, 'run_records', [])
+                    self.report.extend(records)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait = True, cancel_futures = True)
+
+        wall = time.perf_counter() - start
+        if durations:
+            path, total = critical_path(upstream, durations)
+            log.info(
+                'Critical path: %s = %.2fs of %.2fs task wall time (%.2fs of pipeline time).',
+                ' -> '.join(f'{p} ({durations[p]:.2f}s)' for p in path), total, wall, sum(durations.values())
+            )
+        for name, err in errors.items():
+            log.error('Pipeline %s failed: %r', name, err)
+        if errors:
+            raise PipelineError('task', {name: errors[name] for name in task.pipelines if name in errors})
+        return None
+
+    def _components(self, name: str) -> Iterator[tuple[str, str]]:
+        '''(component type, name) of every component a task or pipeline uses, in pipeline order.'''
+        pipelines = self.etl_cfg.tasks[name].pipelines if name in self.etl_cfg.tasks else [name]
+        for pipeline in pipelines:
+            pipe: YamlPipelines = self.etl_cfg.pipelines[pipeline]
+            for component_type in ('extractors', 'transformers', 'loaders'):
+                for key in getattr(pipe, component_type):
+                    yield component_type, key
+
+    def warm(self, name: str) -> None:
+        '''Imports the class of every component a task or pipeline uses, so a long-lived process pays for the imports up front.'''
+        for component_type, key in self._components(name):
+            self._resolve(getattr(self.etl_cfg, component_type)[key])
+        log.debug('Component classes of %s imported.', name)
+        return None
+
     # Method to be called to kickstart process, checks if task or pipeline for single or multiple runs.
     @log_exceptions
-    def run(self, name: str) -> None:
+    def run(self, name: str, force: bool = False, from_stage: str | None = None, profile: bool = False, profile_only: str | None = None) -> None:
+        '''Runs a task or a single pipeline.
+
+        :param name: Task or pipeline name from the pipeline.yml.
+        :type name: str
+        :param force: Re-run every stage of checkpointed pipelines. Defaults to False.
+        :type force: bool
+        :param from_stage: Re-run checkpointed stages from this component onwards. Defaults to None.
+        :type from_stage: str | None
+        :param profile: Profile component calls into `Settings.storage/profiles/<run_id>/`, stages run serially. Defaults to False.
+        :type profile: bool
+        :param profile_only: Only profile the component with this name. Defaults to None.
+        :type profile_only: str | None
+        '''
+        task = None
+        artifacts = None
         if name in self.etl_cfg.tasks:
-            pipelines = self.etl_cfg.tasks[name].pipelines
+            task = self.etl_cfg.tasks[name]
+            artifacts = task.artifacts
             log.info('Task %s selected successfully.', name)
-        elif name in self.etl_cfg.pipelines:
-            pipelines = [name]
-        else:
+        elif name not in self.etl_cfg.pipelines:
             raise ValueError(f'{name} task or pipeline name could not be found. Exiting without changes.')
-        
-        for pipe in pipelines:
-            self._run_single_pipeline(pipe)
+
+        # A mistyped stage would otherwise match nothing and silently reuse every checkpoint
+        if from_stage is not None and from_stage not in {key for _, key in self._components(name)}:
+            raise ValueError(f'{from_stage} is not a component of {name}, --from-stage takes an extractor, transformer or loader name. Exiting without changes.')
+
+        self.checkpoints = Checkpoints(force, from_stage)
+        self.report = RunReport(name)
+        self.profiler = Profiler(self.report.run_id, profile_only) if profile or profile_only else None
+
+        # Intermediate frames only live for the length of the task
+        if artifacts is not None:
+            self.store = ArtifactStore(artifacts.keep, artifacts.memory_mb, artifacts.spill)
+        try:
+            if task is not None:
+                self._run_task(task)
+            else:
+                self._run_single_pipeline(name)
+        finally:
+            # Components live for one run, models and connections are released with them
+            self._teardown()
+            if self.store is not None:
+                self.store.close()
+                self.store = None
+            self.profiler = None
 
 # EOF
 
@@ -1,99 +1,106 @@
 # Import dependencies
 import pandas as pd
+import numpy as np
 import logging
 log = logging.getLogger(__name__)
 
-from ETL.etl_bin import BaseTransformer
+from ETL.etl_bin import BaseTransformer, CategorySchema
+
+# Socrata floating timestamp, e.g. 2024-05-14T00:00:00.000
+DATE_FMT = '%Y-%m-%dT%H:%M:%S.%f'
+
+ACTION_MAP = {
+    'Violations were cited in the following area(s).': 'cited_violation',
+    'Establishment Closed by DOHMH. Violations were cited in the following area(s) and those requiring immediate action were addressed.': 'cited_violations_and_closed',
+    'No violations were recorded at the time of this inspection.': 'no_violations',
+    'Establishment re-opened by DOHMH.': 'reopened',
+    'Establishment re-closed by DOHMH.': 'reclosed'
+}
+
+INT_COLS = ['camis', 'zipcode', 'score', 'census_tract']
+FLT_COLS = ['latitude', 'longitude']
+DT_COLS  = ['inspection_date']
+
 
 class InspectionCleaner(BaseTransformer):
-    def __init__(self):
+    '''Cleans raw Socrata inspection rows in a single pass over the columns that change.
+    Columns are converted in place, only the text columns left over at the end are cast to the `string` dtype.
+
+    :param categories: Dataset name whose stored vocabularies are used to cast the low-cardinality text columns
+        to pandas Categoricals. Defaults to None, leaving them as strings.
+    :type categories: str | None
+    '''
+    frame_attrs = ('df',)
+
+    def __init__(self, categories: str | None = None):
+        self.schema = CategorySchema(categories) if categories else None
         log.info('InspectionCleaner constructed successfully.')
 
     def _map_actions(self):
-        self.action_map = {
-            'Violations were cited in the following area(s).': 'cited_violation',
-            'Establishment Closed by DOHMH. Violations were cited in the following area(s) and those requiring immediate action were addressed.': 'cited_violations_and_closed',
-            'No violations were recorded at the time of this inspection.': 'no_violations',
-            'Establishment re-opened by DOHMH.': 'reopened',
-            'Establishment re-closed by DOHMH.': 'reclosed'
-        }
-        self.df['action'] = self.df['action'].map(self.action_map)
+        self.df['action'] = self.df['action'].map(ACTION_MAP)
         log.debug('_map_actions() finished.')
         return self
 
     def _split_into_two_columns(self, cols: list[str]):
-        self.df[cols] = (
-            self.df[cols[0]]
-            .str
-                .split('/', n = 1, expand = True)
-            .rename(
-                columns = {0: cols[0], 1: cols[1]}
-            )
-        )
-        for col in cols:
-            self.df[col] = self.df[col].str.strip()
-
-        cols = list(self.df.columns)
-        new_order = cols[:6]
-        new_order.extend(reversed(cols[-2:]))
-        new_order.extend(cols[6:-2])
-
-        self.df = self.df[new_order]
+        # Low cardinality column, so the partition runs once per distinct value and is mapped back by code
+        codes, uniques = pd.factorize(self.df[cols[0]])
+        parts = pd.Series(uniques, dtype = object).str.partition('/')
+        # Trailing NaN is picked up by the -1 code of missing values
+        first = np.append(parts[0].str.strip().to_numpy(), np.nan)
+        second = np.append(parts[2].str.strip().where(parts[1] == '/').to_numpy(), np.nan)
+
+        self.df[cols[0]] = first.take(codes)
+        self.df.insert(self.df.columns.get_loc(cols[0]) + 1, cols[1], second.take(codes))
         log.debug('_split_into_two_columns finished.')
         return self
-    
-    def _fill_nulls(self, row_mask: pd.Series, target: str, fill: int | str):
-        self.df.loc[row_mask, target] = self.df.loc[row_mask, target].fillna(fill)
-        return self
 
-    def _convert_int(self, cols: list[str]):
-        self.df[cols] = self.df[cols].astype(int)
-        return self
-    
-    def _convert_flt(self, cols: list[str]):
-        self.df[cols] = self.df[cols].astype(float).round(5)
+    def _null_handler(self):
+        # A missing score is a zero when nothing was cited, all three cases share one mask
+        fill_zero = self.df['score'].isna() & (
+            self.df['critical_flag'].eq('Not Applicable')
+            | self.df['action'].eq('no_violations')
+            | self.df['violation_code'].isna()
+        )
+        self.df['score'] = self.df['score'].mask(fill_zero, '0')
+        self.df['violation_code'] = self.df['violation_code'].fillna('None')
+        log.debug('_null_handler() finished.')
         return self
 
-    def _convert_dt(self, cols: list[str]):
-        self.df[cols] = self.df[cols].apply(pd.to_datetime)
-        return self
-    
+    def _convert_dtypes(self):
+        for col in INT_COLS:
+            self.df[col] = self.df[col].astype('int64')
+        for col in FLT_COLS:
+            self.df[col] = self.df[col].astype('float64').round(5)
+        for col in DT_COLS:
+            self.df[col] = pd.to_datetime(self.df[col], format = DATE_FMT)
 
-    def _null_handler(self):
-        null_score = (self.df['score'].isna())
-        masks = [
-            ((self.df['critical_flag'] == 'Not Applicable') & (null_score)),
-            ((self.df['action'] == 'no_violations') & (null_score)),
-            ((self.df['violation_code'].isna()) & (null_score))
-        ]
-        for mask in masks:
-            self._fill_nulls(mask, 'score', '0')
-        
-        self._fill_nulls(self.df['violation_code'].isna(), 'violation_code', 'None')
-        log.debug('_null_handler() finished.')
+        if self.schema is not None:
+            self.schema.apply(self.df)
+
+        text_cols = [c for c in self.df.columns if c not in INT_COLS + FLT_COLS + DT_COLS and not isinstance(self.df[c].dtype, pd.CategoricalDtype)]
+        self.df[text_cols] = self.df[text_cols].astype('string')
         return self
 
 
     def transform(self, df: pd.DataFrame):
         self.df = df
+        # An incremental run with nothing new hands over an empty frame, possibly without any columns at all
+        if self.df.empty:
+            log.info('Nothing to transform, DataFrame is empty.')
+            return self.df
         log.info('Beginning transformations. DataFrame is of shape %s.' % str(self.df.shape))
-        
+
         # Maps actions taken for inspections into much smaller phrases | Splits the inspection column by type/subtype
         self._map_actions()
         self._split_into_two_columns(['inspection_type', 'inspection_subtype'])
 
-        # Readies the df for null filling by converting everything to string type
-        self.df = self.df.convert_dtypes()
-
         # Filling as many nulls as possible using the knowledge of the dataset
         self._null_handler()
 
         # Dropping any rows with a null field and converting all datatypes explicitly
         self.df.dropna(how = 'any', inplace = True)
-        self._convert_int(['camis', 'zipcode', 'score', 'census_tract'])
-        self._convert_flt(['latitude', 'longitude'])
-        self._convert_dt(['inspection_date'])
-        
+        self._convert_dtypes()
+
         log.debug('All datatypes converted properly.')
         log.info('Transformations successful! DataFrame is of shape %s.' % str(self.df.shape))
         return self.df
@@ -102,4 +109,4 @@ class InspectionCleaner(BaseTransformer):
 # EOF
 
 if __name__ == '__main__':
-    print('This module is intended to be imported, not run directly.')
\ No newline at end of file
+    print('This module is intended to be imported, not run directly.')
@@ -8,6 +8,10 @@ from ETL.etl_bin import BaseTransformer
 from ml_lib import binning_cats, cycle_dates
 
 class PrepTransformer(BaseTransformer):
+    # Rolling per-restaurant measures need every inspection of a camis in one frame
+    needs_full_frame = True
+    frame_attrs = ('df',)
+
     def __init__(self, bins: dict[str, int]):
         self.target = 'score'
         self.bins = bins
@@ -30,7 +34,8 @@ class PrepTransformer(BaseTransformer):
     
     def cat_binner(self, bin: str, thresh: int):
         self.df = binning_cats(self.df, bin, thresh)
-        self.df[bin] = self.df[bin].astype(str)
+        if not isinstance(self.df[bin].dtype, pd.CategoricalDtype):
+            self.df[bin] = self.df[bin].astype(str)
         return self
     
     def dt_cycler(self, col: str, func: Callable):
@@ -1,5 +1,4 @@
 from .core_bin import Settings, log_exceptions, auto_log_cls, find_root, create_dict, create_ref_table
-from .db_util import Database
 from .factory import get_settings, get_engine, get_session_factory
 from .logger import log_setup
 
@@ -10,6 +9,15 @@ __all__ = [
     'log_setup',
 ]
 
+
+# Database wraps SQLAlchemy sessions, it is imported on first use so settings and logging stay light
+def __getattr__(name: str):
+    if name == 'Database':
+        from .db_util import Database
+        globals()['Database'] = Database
+        return Database
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
 # EOF
 
 if __name__ == '__main__':
@@ -1,7 +1,11 @@
 # Import dependencies
 from collections.abc import Callable
+from typing import TYPE_CHECKING
 from pathlib import Path
-import pandas as pd
+
+# pandas is only needed to build reference tables, it is imported there
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def find_root(
@@ -50,7 +54,7 @@ def create_dict(
 def create_ref_table(
         mapping: dict[str, str]
         ,target_col: str
-    ) -> pd.DataFrame:
+    ) -> 'pd.DataFrame':
     '''Readies reference/parent table for SQL insertion.
 
     :param  mapping:        Mapping from `create_dict()`.
@@ -61,6 +65,8 @@ def create_ref_table(
     :returns:               Two column table with unique IDs.
     :rtype:                 pd.DataFrame
     '''
+    import pandas as pd
+
     # Adds 'id' to target column's name to create reference ID column
     new_col = f'{target_col}_id'
 
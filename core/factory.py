@@ -1,12 +1,14 @@
 # Import dependencies
 from functools import lru_cache
-from sqlalchemy import Engine, create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy_utils import create_database, database_exists
+from typing import TYPE_CHECKING
 
 # Custom libraries
 from core.core_bin import Settings
-from schemas import Base
+
+# SQLAlchemy and the schemas are imported inside the DB factories, settings alone should not pay for them
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+    from sqlalchemy.orm import sessionmaker, Session
 
 @lru_cache()
 def get_settings(**kwargs) -> Settings:
@@ -21,7 +23,7 @@ def get_settings(**kwargs) -> Settings:
     return Settings(**kwargs)
 
 @lru_cache()
-def get_engine(**kwargs) -> Engine:
+def get_engine(**kwargs) -> 'Engine':
     '''Factory function to get DB engine. Initial run creates DB and posts schema. Calls `get_settings()` factory too.
 
     :param  kwargs: Overwrites parsed/defaulted environment settings.
@@ -30,15 +32,20 @@ def get_engine(**kwargs) -> Engine:
     :return:        SQL Alchemy configured Engine.
     :rtype:         Engine
     '''
+    from sqlalchemy import create_engine
+    from sqlalchemy_utils import create_database, database_exists
+    from schemas import Base
+
     settings = get_settings(**kwargs)
     uri = settings.engine_uri
     if not database_exists(uri): create_database(uri)
-    eng = create_engine(settings.engine_uri)
+    # Pre-ping replaces connections the server dropped while a long-lived process sat idle
+    eng = create_engine(settings.engine_uri, pool_pre_ping = True)
     Base.metadata.create_all(eng)
     return eng
 
 @lru_cache
-def get_session_factory(**kwargs) -> sessionmaker[Session]:
+def get_session_factory(**kwargs) -> 'sessionmaker[Session]':
     '''Factory function to get a bound session maker. Calls `get_engine()` and therefore `get_settings()` too.
 
     :param  kwargs: Overwrites parsed/defaulted environment settings.
@@ -47,6 +54,8 @@ def get_session_factory(**kwargs) -> sessionmaker[Session]:
     :return:        SQL Alchemy bound session factory.
     :rtype:         sessionmaker[Session]
     '''
+    from sqlalchemy.orm import sessionmaker
+
     engine = get_engine(**kwargs)
     return sessionmaker(bind = engine, expire_on_commit = False)
 
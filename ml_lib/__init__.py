@@ -1,14 +1,30 @@
-from .gridder import (
-    suppress_warnings, 
-    fast_est_scores, 
-    full_est_scores, 
-    grid_to_pd, 
-    expand_csv, 
-    read_write_grid, 
-    learning_curve_plot
-)
-from .lgbm import LGBMOrdinal
-from .prepper import binning_cats, cycle_dates
+from importlib import import_module
+
+# Public names and the submodule defining them. Submodules (and sklearn, matplotlib, lightgbm behind them)
+# are only imported on first attribute access, so `from ml_lib import binning_cats` stays cheap
+_EXPORTS = {
+    'suppress_warnings':    'gridder',
+    'fast_est_scores':      'gridder',
+    'full_est_scores':      'gridder',
+    'grid_to_pd':           'gridder',
+    'expand_csv':           'gridder',
+    'read_write_grid':      'gridder',
+    'learning_curve_plot':  'gridder',
+
+    'LGBMOrdinal':          'lgbm',
+
+    'BudgetedRandomSearchCV': 'search',
+    'OOFStackingClassifier':  'stacker',
+    'DesignCache':            'design_cache',
+    'CachedPrep':             'design_cache',
+    'ThreadBudget':           'budget',
+    'pooled_grid_search':     'scheduler',
+    'fit_time_history':       'scheduler',
+    'POOLED_SUPPORTED':       'scheduler',
+
+    'binning_cats':         'prepper',
+    'cycle_dates':          'prepper',
+}
 
 __all__ = [
     'suppress_warnings', 
@@ -20,11 +36,32 @@ __all__ = [
     'learning_curve_plot',
     
     'LGBMOrdinal',
+
+    'BudgetedRandomSearchCV',
+    'OOFStackingClassifier',
+    'DesignCache',
+    'CachedPrep',
+    'ThreadBudget',
+    'pooled_grid_search',
+    'fit_time_history',
+    'POOLED_SUPPORTED',
     
     'binning_cats', 'cycle_dates',
 ]
 
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
+
 # EOF
 
 if __name__ == '__main__':
-    print('This module is intended to be imported, not run directly.')
\ No newline at end of file
+    print('This module is intended to be imported, not run directly.')
@@ -0,0 +1,106 @@
+# Import dependencies
+from contextlib import contextmanager
+from collections.abc import Iterator
+from pathlib import Path
+import time
+import os
+import logging
+log = logging.getLogger(__name__)
+
+# Not on Windows, where the utilisation is simply not logged
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Scikit Helpers
+from joblib import parallel_config
+from threadpoolctl import threadpool_limits
+
+
+def _cores() -> int:
+    # Cores this process may run on, which is less than the machine under taskset or a container CPU set
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _live_children() -> float:
+    '''CPU seconds of the children still running, read from /proc. Loky keeps its workers up between searches,
+    so they are not in the children's rusage until they exit.'''
+    tick = os.sysconf('SC_CLK_TCK')
+    seconds = 0.0
+    for tasks in Path('/proc/self/task').glob('*/children'):
+        for pid in tasks.read_text().split():
+            try:
+                # Fields after the command name, which may itself contain spaces: utime, stime, cutime, cstime
+                fields = Path(f'/proc/{pid}/stat').read_text().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            seconds += sum(int(v) for v in fields[11:15]) / tick
+    return seconds
+
+
+def _cpu_seconds() -> float | None:
+    '''User and system CPU seconds of this process and its children, reaped or still running.'''
+    if resource is None:
+        return None
+    own, reaped = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + reaped.ru_utime + reaped.ru_stime + _live_children()
+
+
+class ThreadBudget:
+    '''Splits a core budget between the outer workers of a search and the threads inside each worker, so nested
+    parallelism (joblib workers running LightGBM/RandomForest threads and BLAS pools) cannot oversubscribe the box.
+    Each model family gets `inner` threads per worker and `cores // inner` workers, capped at `max_outer`.
+
+    :param cores: Cores to use in total. Defaults to None, every core the process may run on.
+    :type cores: int | None
+    :param inner: Threads per worker for each family name, others get 1. Defaults to None.
+    :type inner: dict[str, int] | None
+    :param max_outer: Cap on the workers of any family, -1 or None for no cap. Defaults to None.
+    :type max_outer: int | None
+    '''
+    def __init__(self, cores: int | None = None, inner: dict[str, int] | None = None, max_outer: int | None = None):
+        self.cores = max(1, min(cores or _cores(), _cores()))
+        self.inner = dict(inner or {})
+        self.max_outer = None if max_outer is None or max_outer < 0 else max_outer
+
+    def __repr__(self) -> str:
+        return f'ThreadBudget(cores={self.cores}, inner={self.inner}, max_outer={self.max_outer})'
+
+    def split(self, *families: str) -> tuple[int, int]:
+        '''(outer workers, inner threads) of a family, their product never exceeds `cores`. Families sharing one pool
+        get the most inner threads any of them asks for.'''
+        inner = max(1, min(max(self.inner.get(family, 1) for family in families), self.cores))
+        outer = self.cores // inner
+        if self.max_outer is not None:
+            outer = min(outer, max(1, self.max_outer))
+        return outer, inner
+
+    @contextmanager
+    def limit(self, *families: str) -> Iterator[tuple[int, int]]:
+        '''Caps BLAS/OpenMP threads to the family's inner threads, in this process with threadpoolctl and in joblib's
+        loky workers through `inner_max_num_threads`, and logs how much of the core budget the process and its
+        workers used while it was active.
+        Estimators with their own `n_jobs` (RandomForest, LightGBM) still need it set to the inner threads.
+
+        :returns: (outer workers, inner threads) to pass on as the search's and the estimator's `n_jobs`.
+        :rtype: tuple[int, int]
+        '''
+        outer, inner = self.split(*families)
+        family = '+'.join(families)
+        before, t = _cpu_seconds(), time.perf_counter()
+        with parallel_config(backend = 'loky', inner_max_num_threads = inner), threadpool_limits(limits = inner):
+            yield outer, inner
+        wall = time.perf_counter() - t
+        after = _cpu_seconds()
+        if before is None or after is None or not wall:
+            log.info('%s: %d worker(s) x %d thread(s) of %d cores, %.1fs.', family, outer, inner, self.cores, wall)
+            return None
+        used = (after - before) / wall
+        log.info(
+            '%s: %d worker(s) x %d thread(s) of %d cores, %.1fs, CPU %.0f%% of budget (%.1f of %d cores).',
+            family, outer, inner, self.cores, wall, 100 * used / self.cores, used, self.cores
+        )
+        return None
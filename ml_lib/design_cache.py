@@ -0,0 +1,193 @@
+# Import dependencies
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from scipy import sparse
+import hashlib
+import shutil
+import joblib
+import os
+
+# Scikit Helpers
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+
+
+def _fingerprint(X) -> str:
+    '''Cheap identity of a design matrix: shape, columns, the hashed row index and a strided sample of the rows.
+    The folds of one training frame differ in their row index, so hashing every value is not needed to tell them apart.'''
+    h = hashlib.blake2b(digest_size = 16)
+    h.update(repr(np.shape(X)).encode())
+    if isinstance(X, pd.DataFrame):
+        h.update(repr(list(X.columns)).encode())
+        h.update(pd.util.hash_pandas_object(X.index, index = False).to_numpy().tobytes())
+        sample = X.iloc[::max(1, len(X) // 256)]
+        h.update(pd.util.hash_pandas_object(sample, index = False).to_numpy().tobytes())
+    else:
+        X = np.asarray(X)
+        h.update(np.ascontiguousarray(X[::max(1, len(X) // 256)]).tobytes())
+    return h.hexdigest()
+
+
+class DesignCache:
+    '''Directory of preprocessed design matrices, stored as `.npy` files and read back memory-mapped, so the
+    parallel search jobs of every model family share one copy of each fold instead of preprocessing it again.
+    CSR matrices are kept as their data, indices and indptr arrays and come back as CSR.
+    Hits and misses of all processes are appended to one file, so `stats` covers the workers as well.
+
+    :param path: Directory of the cache, created when missing.
+    :type path: Path | str
+    '''
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.path.mkdir(parents = True, exist_ok = True)
+        self._preps: dict = {}
+
+    def __repr__(self) -> str:
+        return f'DesignCache({str(self.path)!r})'
+
+    def __deepcopy__(self, memo: dict) -> 'DesignCache':
+        # sklearn's clone deep copies non-estimator params, every clone of a step has to keep the same cache
+        return self
+
+    def _count(self, hit: bool) -> None:
+        # Single byte appends are atomic, the joblib workers can all write to the same file
+        with open(self.path / 'lookups', 'ab') as f:
+            f.write(b'h' if hit else b'm')
+        return None
+
+    def _atomic(self, target: Path, write) -> None:
+        # Two workers can miss on the same key at once, the last complete file wins and readers never see a partial one
+        tmp = target.with_name(f'{target.name}.{os.getpid()}.tmp')
+        write(tmp)
+        os.replace(tmp, target)
+        return None
+
+    def _save(self, name: str, arr: np.ndarray) -> None:
+        def write(tmp: Path) -> None:
+            # Through a file object, np.save would otherwise append .npy to the temporary name
+            with open(tmp, 'wb') as f:
+                np.save(f, arr)
+        self._atomic(self.path / name, write)
+        return None
+
+    def _load(self, key: str):
+        if (self.path / f'{key}.dense.npy').is_file():
+            return np.load(self.path / f'{key}.dense.npy', mmap_mode = 'r')
+        data, indices, indptr = (np.load(self.path / f'{key}.{part}.npy', mmap_mode = 'r') for part in ('data', 'indices', 'indptr'))
+        shape = tuple(np.load(self.path / f'{key}.shape.npy'))
+        return sparse.csr_matrix((data, indices, indptr), shape = shape, copy = False)
+
+    def get(self, key: str) -> np.ndarray | sparse.csr_matrix | None:
+        hit = (self.path / f'{key}.dense.npy').is_file() or (self.path / f'{key}.shape.npy').is_file()
+        self._count(hit)
+        return self._load(key) if hit else None
+
+    def put(self, key: str, Xt) -> np.ndarray | sparse.csr_matrix:
+        if not sparse.issparse(Xt):
+            self._save(f'{key}.dense.npy', np.ascontiguousarray(Xt, dtype = np.float64))
+            return self._load(key)
+        Xt = sparse.csr_matrix(Xt, dtype = np.float64)
+        Xt.sort_indices()
+        for part in ('data', 'indices', 'indptr'):
+            self._save(f'{key}.{part}.npy', getattr(Xt, part))
+        # Written last, a reader only takes the matrix once all its arrays are complete
+        self._save(f'{key}.shape.npy', np.array(Xt.shape))
+        return self._load(key)
+
+    def get_prep(self, key: str):
+        # Fitted preps are kept in memory as well, every candidate of a fold would otherwise unpickle the same one
+        file = self.path / f'{key}.joblib'
+        if key not in self._preps and file.is_file():
+            self._preps[key] = joblib.load(file)
+        return self._preps.get(key)
+
+    def put_prep(self, key: str, prep) -> None:
+        self._atomic(self.path / f'{key}.joblib', lambda tmp: joblib.dump(prep, tmp))
+        self._preps[key] = prep
+        return None
+
+    def stats(self) -> dict[str, float]:
+        '''Lookups, hits, hit rate and disk footprint of everything cached so far.'''
+        lookups = self.path / 'lookups'
+        counts = lookups.read_bytes() if lookups.is_file() else b''
+        hits = counts.count(b'h')
+        files = [f for f in self.path.iterdir() if f.suffix in ('.npy', '.joblib')]
+        return {
+            'lookups':  len(counts),
+            'hits':     hits,
+            'hit_rate': hits / len(counts) if counts else 0.0,
+            'matrices': sum(f.name.endswith(('.dense.npy', '.shape.npy')) for f in files),
+            'mb':       sum(f.stat().st_size for f in files) / 1e6,
+        }
+
+    def clear(self) -> None:
+        self._preps.clear()
+        shutil.rmtree(self.path, ignore_errors = True)
+        self.path.mkdir(parents = True, exist_ok = True)
+        return None
+
+
+class CachedPrep(TransformerMixin, BaseEstimator):
+    '''Pipeline step that fits and applies `prep` through a `DesignCache`. Fitting on a frame the cache has seen
+    (same fold, any candidate, any model family) reads the transformed matrix back instead of fitting `prep`
+    again, and transforming a frame with a fitted step is keyed on both frames. Output is a float64 ndarray, or a
+    CSR matrix when `prep` emits sparse output.
+    With `cache` set to None it is a plain wrapper around `prep`, which is how fitted models should be saved.
+
+    :param prep: Unfitted preprocessing transformer, e.g. a `ColumnTransformer`.
+    :type prep: TransformerMixin
+    :param cache: Shared cache, None disables caching. Defaults to None.
+    :type cache: DesignCache | None
+    '''
+    def __init__(self, prep, cache: DesignCache | None = None):
+        self.prep = prep
+        self.cache = cache
+
+    def _new_prep(self):
+        return clone(self.prep).set_output(transform = 'default')
+
+    def _fitted(self, prep) -> None:
+        self.prep_ = prep
+        self.n_features_in_ = prep.n_features_in_
+        if hasattr(prep, 'feature_names_in_'):
+            self.feature_names_in_ = prep.feature_names_in_
+        return None
+
+    def fit(self, X, y = None):
+        self.fit_transform(X, y)
+        return self
+
+    def fit_transform(self, X, y = None):
+        if self.cache is None:
+            prep = self._new_prep()
+            Xt = prep.fit_transform(X)
+            self._fitted(prep)
+            self.fit_key_ = None
+            return Xt
+        # The unfitted prep is part of the key, so a changed column list cannot pick up stale matrices
+        self.fit_key_ = f'{joblib.hash(self.prep)[:12]}-{_fingerprint(X)}'
+        Xt = self.cache.get(self.fit_key_)
+        prep = self.cache.get_prep(self.fit_key_) if Xt is not None else None
+        if prep is None:
+            prep = self._new_prep()
+            Xt = self.cache.put(self.fit_key_, prep.fit_transform(X))
+            self.cache.put_prep(self.fit_key_, prep)
+        self._fitted(prep)
+        return Xt
+
+    def transform(self, X):
+        if self.cache is None or getattr(self, 'fit_key_', None) is None:
+            return self.prep_.transform(X)
+        key = f'{self.fit_key_}-{_fingerprint(X)}'
+        Xt = self.cache.get(key)
+        if Xt is None:
+            Xt = self.cache.put(key, self.prep_.transform(X))
+        return Xt
+
+    def warm(self, X, cv, y = None) -> 'CachedPrep':
+        '''Preprocesses every train/validation split of `cv` on `X` into the cache up front, one fold at a time,
+        so the parallel search jobs find them instead of racing to build the same matrices.'''
+        for train, test in cv.split(X, y):
+            step = clone(self).fit(X.iloc[train])
+            step.transform(X.iloc[test])
+        return self
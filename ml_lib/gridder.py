@@ -1,9 +1,6 @@
 # Import dependencies
-from sklearn.metrics import classification_report, mean_absolute_error, cohen_kappa_score
-from sklearn.model_selection import GridSearchCV, learning_curve
-from sklearn.ensemble import StackingClassifier
 from contextlib import redirect_stderr, contextmanager
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING
 import pandas as pd
 import warnings
 import ast
@@ -11,7 +8,10 @@ import os
 
 # Bring in Core
 from core import get_settings
-cfg = get_settings()
+
+# sklearn and matplotlib are imported where they are used, importing ml_lib should not pay for them
+if TYPE_CHECKING:
+    from sklearn.model_selection import GridSearchCV
 
 # Boiler plate for warning supression
 @contextmanager
@@ -22,12 +22,13 @@ def suppress_warnings():
             with redirect_stderr(devnull):
                 yield
 
-def _get_clf_report(search_obj: GridSearchCV, X_te, y_te):
+def _get_clf_report(search_obj: 'GridSearchCV', X_te, y_te):
+    from sklearn.metrics import classification_report
     with suppress_warnings():
         print(classification_report(y_te, search_obj.predict(X_te)))
     return None
 
-def _get_est_scores(search_obj: GridSearchCV, X_te, y_te):
+def _get_est_scores(search_obj: 'GridSearchCV', X_te, y_te):
     with suppress_warnings():
         print(
             f'Best Params: {search_obj.best_params_}\n'
@@ -44,7 +45,8 @@ def fast_est_scores(search_obj, Xy_dict: dict[str, pd.DataFrame]):
     _get_est_scores(search_obj, X_te, y_te)
     return None
 
-def full_est_scores(search_grid: GridSearchCV, Xy_dict: dict[str, pd.DataFrame]):
+def full_est_scores(search_grid: 'GridSearchCV', Xy_dict: dict[str, pd.DataFrame]):
+    from sklearn.metrics import mean_absolute_error, cohen_kappa_score
     est = getattr(search_grid, 'best_estimator_', search_grid)
     X_tr = Xy_dict['X_tr']
     y_tr = Xy_dict['y_tr']
@@ -65,17 +67,20 @@ def full_est_scores(search_grid: GridSearchCV, Xy_dict: dict[str, pd.DataFrame])
     print('QWK test: ', cohen_kappa_score(y_te,  y_pred_test, weights='quadratic'))
 
 
-def grid_to_pd(grid: GridSearchCV) -> pd.DataFrame:
+def grid_to_pd(grid: 'GridSearchCV') -> pd.DataFrame:
     cols = [
         'params', 'mean_fit_time', 
         'std_fit_time', 'mean_score_time', 
         'std_score_time', 'mean_test_score', 
         'std_test_score', 'rank_test_score'
     ]
+    # Successive halving also reports the round and the resources each candidate got
+    cols += [c for c in ('iter', 'n_resources') if c in grid.cv_results_]
     df = pd.DataFrame(grid.cv_results_, columns = cols)
     full_params = pd.json_normalize(df['params'])
     clf = full_params.pop('clf')
     df['params'] = full_params.apply(lambda row: row.dropna().to_dict(), axis = 1)
+    df.insert(0, 'search', type(grid).__name__)
 
     return pd.concat([clf, df], axis = 1).copy()
 
@@ -90,7 +95,7 @@ def _parse_params(cell: str) -> dict:
 
 # Expand df takes in a dataframe and applies parse_params and expands the dataframe
 def expand_csv(file_name = 'grid_log.csv'):
-    df = pd.read_csv(cfg.storage / file_name)
+    df = pd.read_csv(get_settings().storage / file_name)
     df['params'] = df['params'].apply(_parse_params)
     params = pd.json_normalize(df['params'])
 
@@ -98,8 +103,8 @@ def expand_csv(file_name = 'grid_log.csv'):
     return pd.concat([df, params], axis = 1)
 
 
-def read_write_grid(search_grid: GridSearchCV, file_name = 'grid_log.csv', overwrite = False):
-    path = cfg.storage / file_name
+def read_write_grid(search_grid: 'GridSearchCV', file_name = 'grid_log.csv', overwrite = False):
+    path = get_settings().storage / file_name
     df = grid_to_pd(search_grid)
     if not overwrite:
         if path.is_file():
@@ -112,8 +117,10 @@ def read_write_grid(search_grid: GridSearchCV, file_name = 'grid_log.csv', overw
     return None
 
 def learning_curve_plot(
-        name: str, search_grid: GridSearchCV, Xy_dict: dict[str, pd.DataFrame], cv: int = 5
+        name: str, search_grid: 'GridSearchCV', Xy_dict: dict[str, pd.DataFrame], cv: int = 5
     ):
+    from sklearn.model_selection import learning_curve
+    import matplotlib.pyplot as plt
     est = getattr(search_grid, 'best_estimator_', search_grid)
     X_tr = Xy_dict['X_tr']
     y_tr = Xy_dict['y_tr']
@@ -149,6 +156,6 @@ def learning_curve_plot(
     plt.xlabel('Number of training examples')
     plt.ylabel('Accuracy')
     plt.legend()
-    plt.savefig((cfg.storage / f'{name}.png'), dpi = 300, bbox_inches = 'tight')
+    plt.savefig((get_settings().storage / f'{name}.png'), dpi = 300, bbox_inches = 'tight')
     plt.show()
     return None
\ No newline at end of file
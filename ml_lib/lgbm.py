@@ -1,10 +1,67 @@
 # Import dependencies
-from lightgbm import LGBMRegressor
+from lightgbm import LGBMRegressor, early_stopping
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.utils import _safe_indexing
 import numpy as np
 
 # Define new class inherited from regressor
 # Sets LGBM to clip and threshold to ensure discrete integer comptability
 class LGBMOrdinal(LGBMRegressor):
+    '''LightGBM regressor rounded and clipped to the 0-2 grade scale. Every other keyword goes to `LGBMRegressor`.
+
+    :param categorical: Column positions of integer-coded categoricals, split natively by LightGBM instead of
+        as one-hot dummies. Negative codes count as missing. Defaults to None.
+    :type categorical: list[int] | None
+    :param early_stop_rounds: Stop adding trees once the held-out fold has not improved for this many rounds, then
+        refit on all rows with the tree count it chose. `n_estimators` becomes the upper bound. Defaults to None, off.
+    :type early_stop_rounds: int | None
+    :param early_stop_splits: The held-out fold is the last of a `TimeSeriesSplit` with this many splits, so rows
+        must be in time order. Defaults to 3.
+    :type early_stop_splits: int
+    '''
+    # Ours, not LightGBM parameters, they are kept out of the booster's params
+    _ordinal_params = ('categorical', 'early_stop_rounds', 'early_stop_splits')
+
+    def __init__(self, *, categorical = None, early_stop_rounds = None, early_stop_splits = 3, **kwargs):
+        self.categorical = categorical
+        self.early_stop_rounds = early_stop_rounds
+        self.early_stop_splits = early_stop_splits
+        super().__init__(**kwargs)
+
+    def __repr__(self) -> str:
+        # The **kwargs signature hides LightGBM's defaults from sklearn's repr, which would then list every parameter
+        # in the grid_log.csv clf column, only the changed ones are shown as for LGBMRegressor itself
+        defaults = {**LGBMRegressor().get_params(), 'categorical': None, 'early_stop_rounds': None, 'early_stop_splits': 3}
+        changed = [f'{k}={v!r}' for k, v in self.get_params().items() if k not in defaults or repr(v) != repr(defaults[k])]
+        return f'{type(self).__name__}({", ".join(changed)})'
+
+    def _process_params(self, stage: str) -> dict:
+        params = super()._process_params(stage)
+        for key in self._ordinal_params:
+            params.pop(key, None)
+        return params
+
+    def fit(self, X, y, **fit_params):
+        if self.categorical is not None:
+            fit_params.setdefault('categorical_feature', list(self.categorical))
+        if not self.early_stop_rounds:
+            return super().fit(X, y, **fit_params)
+
+        train, valid = list(TimeSeriesSplit(n_splits = self.early_stop_splits).split(X))[-1]
+        super().fit(
+            _safe_indexing(X, train), _safe_indexing(y, train),
+            eval_set = [(_safe_indexing(X, valid), _safe_indexing(y, valid))],
+            callbacks = [early_stopping(self.early_stop_rounds, verbose = False)],
+            **fit_params
+        )
+        # The most recent rows were only used to pick the tree count, the final model trains on them as well
+        n_estimators, self.n_estimators = self.n_estimators, max(1, self.best_iteration_)
+        try:
+            super().fit(X, y, **fit_params)
+        finally:
+            self.n_estimators = n_estimators
+        return self
+
     def predict(self, X):
         raw = super().predict(X)
-        return np.clip(np.round(raw), 0, 2).astype(int)
\ No newline at end of file
+        return np.clip(np.round(raw), 0, 2).astype(int)
@@ -5,8 +5,16 @@ import numpy as np
 
 
 def binning_cats(df: pd.DataFrame, col: str, min: int) -> pd.DataFrame:
-    vals_to_replace = [i[0] for i in df[col].value_counts().items() if i[1] < min]
-    df[col] = df[col].replace(vals_to_replace, 'other').astype(str)
+    counts = df[col].value_counts()
+    vals_to_replace = counts.index[counts < min]
+    # Categoricals stay categorical, the rare values collapse into one 'other' category
+    if isinstance(df[col].dtype, pd.CategoricalDtype):
+        s = df[col]
+        if 'other' not in s.cat.categories:
+            s = s.cat.add_categories('other')
+        df[col] = s.where(~s.isin(vals_to_replace), 'other').cat.remove_unused_categories()
+        return df
+    df[col] = df[col].replace(list(vals_to_replace), 'other').astype(str)
     return df
 
 def cycle_dates(df: pd.DataFrame, col: str, func: Callable) -> pd.DataFrame:
@@ -0,0 +1,187 @@
+# Import dependencies
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+import time
+import logging
+log = logging.getLogger(__name__)
+
+# Scikit Helpers
+from sklearn.base import clone, is_classifier
+from sklearn.model_selection import GridSearchCV, ParameterGrid, check_cv
+from sklearn.utils.validation import indexable
+from joblib import Parallel, delayed
+import sklearn
+
+# The pooled search drives private sklearn internals (_fit_and_score and its keywords, _format_results,
+# _select_best_index), which change between minor releases. It is only used on the minor versions it was
+# checked against, setup.py pins the same range, anything else falls back to sequential searches
+SUPPORTED_SKLEARN = ((1, 6),)
+
+try:
+    from sklearn.model_selection._validation import _fit_and_score, _insert_error_scores, _warn_or_raise_about_fit_failures
+except ImportError:
+    _fit_and_score = _insert_error_scores = _warn_or_raise_about_fit_failures = None
+
+POOLED_SUPPORTED: bool = (
+    tuple(int(part) for part in sklearn.__version__.split('.')[:2]) in SUPPORTED_SKLEARN
+    and _fit_and_score is not None
+    and all(hasattr(GridSearchCV, attr) for attr in ('_format_results', '_select_best_index', '_get_scorers'))
+)
+
+# Bring in Core
+from core import get_settings
+from ml_lib.gridder import _parse_params
+
+
+def _norm(value) -> str:
+    # grid_log.csv reads whole-number params back as floats (250.0), candidates hold them as ints
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return repr(float(value))
+    return repr(value)
+
+
+def _fit_key(clf, params: dict) -> tuple[str, tuple]:
+    # The class name rather than the repr, thread counts and other constructor settings do not change the key
+    name = clf if isinstance(clf, str) else type(clf).__name__
+    return name.split('(')[0], tuple(sorted((k, _norm(v)) for k, v in params.items() if k != 'clf'))
+
+
+def fit_time_history(file_name: str = 'grid_log.csv') -> dict[tuple[str, tuple], float]:
+    '''Latest `mean_fit_time` of every exhaustive-grid candidate logged by `read_write_grid`, keyed by estimator class
+    and params. Halving and random searches are left out, their fit times were taken on fewer rows or trees.'''
+    path = get_settings().storage / file_name
+    if not path.is_file():
+        return {}
+    df = pd.read_csv(path)
+    if 'search' in df.columns:
+        df = df[df['search'].isna() | (df['search'] == 'GridSearchCV')]
+    return {
+        _fit_key(clf, _parse_params(params)): float(fit_time)
+        for clf, params, fit_time in zip(df['clf'], df['params'], df['mean_fit_time'])
+        if isinstance(clf, str) and pd.notna(fit_time)
+    }
+
+
+def _estimate(history: dict[tuple[str, tuple], float], key: tuple[str, tuple]) -> float:
+    # Unseen candidates get the median of their estimator class, then of everything logged
+    if key in history:
+        return history[key]
+    same_class = [t for (name, _), t in history.items() if name == key[0]]
+    if same_class:
+        return float(np.median(same_class))
+    return float(np.median(list(history.values()))) if history else 1.0
+
+
+def _refit(search: GridSearchCV, X, y, params: dict):
+    est = clone(search.estimator).set_params(**clone(params, safe = False))
+    t = time.time()
+    est.fit(X, y)
+    return est, time.time() - t
+
+
+def pooled_grid_search(
+        searches: dict[str, GridSearchCV],
+        X,
+        y,
+        n_jobs: int | None = None,
+        history: dict[tuple[str, tuple], float] | None = None
+    ) -> dict[str, GridSearchCV]:
+    '''Fits several unfitted `GridSearchCV`s as one job queue on a single joblib pool instead of one pool per search,
+    so the workers do not idle at the tail of each search waiting for its slowest candidate. Every (search, candidate,
+    fold) fit is one job, dispatched longest first by its past `mean_fit_time` (see `fit_time_history`) scaled to the
+    fold's training rows, and the refits of the best candidates share the pool the same way. Each search comes back
+    as if its own `fit` had run: `cv_results_`, `best_*_`, `scorer_` and `refit_time_` are set, so `read_write_grid`,
+    `full_est_scores` and stacking take them unchanged. Only single-metric searches with `refit = True` are supported.
+
+    :param searches: Unfitted searches by name, fitted in place.
+    :type searches: dict[str, GridSearchCV]
+    :param n_jobs: Workers of the shared pool. Defaults to None, one.
+    :type n_jobs: int | None
+    :param history: Past fit times, defaults to None, reading `grid_log.csv`.
+    :type history: dict[tuple[str, tuple], float] | None
+
+    :raises RuntimeError: When the installed scikit-learn is outside `SUPPORTED_SKLEARN`.
+
+    :returns: The same searches, fitted.
+    :rtype: dict[str, GridSearchCV]
+    '''
+    if not POOLED_SUPPORTED:
+        raise RuntimeError(
+            f'Pooled search supports scikit-learn {", ".join(".".join(map(str, v)) for v in SUPPORTED_SKLEARN)}.x, '
+            f'found {sklearn.__version__}. Fit the searches one by one instead.'
+        )
+    history = fit_time_history() if history is None else history
+    X, y = indexable(X, y)
+
+    jobs, plans, scorers = [], {}, {}
+    for name, search in searches.items():
+        if not isinstance(search, GridSearchCV) or search.refit is not True or not callable(search.scoring):
+            raise ValueError(f'Search {name!r} must be a GridSearchCV with a single scorer and refit = True.')
+        cv = check_cv(search.cv, y, classifier = is_classifier(search.estimator))
+        folds = list(cv.split(X, y))
+        candidates = list(ParameterGrid(search.param_grid))
+        mean_train = np.mean([len(train) for train, _ in folds])
+        plans[name] = (candidates, folds)
+        scorers[name] = search._get_scorers()[0]
+        for c, params in enumerate(candidates):
+            est = _estimate(history, _fit_key(params.get('clf', search.estimator), params))
+            for f, (train, _) in enumerate(folds):
+                jobs.append((est * len(train) / mean_train, name, c, f))
+
+    # Longest first, so the last jobs to finish are short ones and the pool drains evenly
+    jobs.sort(key = lambda job: job[0], reverse = True)
+    log.info(
+        'Pooled search: %d fits of %d searches on %d worker(s), %.0fs of fitting estimated from grid_log.csv.',
+        len(jobs), len(searches), max(1, n_jobs or 1), sum(job[0] for job in jobs)
+    )
+    t = time.perf_counter()
+    outs = Parallel(n_jobs = n_jobs)(
+        delayed(_fit_and_score)(
+            clone(searches[name].estimator),
+            X,
+            y,
+            scorer = scorers[name],
+            train = plans[name][1][f][0],
+            test = plans[name][1][f][1],
+            verbose = 0,
+            parameters = plans[name][0][c],
+            fit_params = {},
+            score_params = {},
+            return_n_test_samples = True,
+            return_times = True,
+            error_score = searches[name].error_score
+        )
+        for _, name, c, f in jobs
+    )
+
+    # Back into each search's candidate-major, fold-minor order, the layout its own fit would have produced
+    by_search: dict[str, dict[tuple[int, int], dict]] = defaultdict(dict)
+    for (_, name, c, f), out in zip(jobs, outs):
+        by_search[name][(c, f)] = out
+    for name, search in searches.items():
+        candidates, folds = plans[name]
+        out = [by_search[name][(c, f)] for c in range(len(candidates)) for f in range(len(folds))]
+        _warn_or_raise_about_fit_failures(out, search.error_score)
+        _insert_error_scores(out, search.error_score)
+        results = search._format_results(candidates, len(folds), out, defaultdict(list))
+        search.multimetric_ = False
+        search.scorer_ = scorers[name]
+        search.n_splits_ = len(folds)
+        search.cv_results_ = results
+        search.best_index_ = search._select_best_index(search.refit, 'score', results)
+        search.best_score_ = results['mean_test_score'][search.best_index_]
+        search.best_params_ = results['params'][search.best_index_]
+
+    refits = sorted(searches, key = lambda name: -searches[name].cv_results_['mean_fit_time'][searches[name].best_index_])
+    fitted = Parallel(n_jobs = n_jobs)(
+        delayed(_refit)(searches[name], X, y, searches[name].best_params_) for name in refits
+    )
+    for name, (est, refit_time) in zip(refits, fitted):
+        search = searches[name]
+        search.best_estimator_ = est
+        search.refit_time_ = refit_time
+        if hasattr(est, 'feature_names_in_'):
+            search.feature_names_in_ = est.feature_names_in_
+    log.info('Pooled search finished in %.1fs.', time.perf_counter() - t)
+    return searches
@@ -0,0 +1,84 @@
+# Import dependencies
+from numbers import Real, Integral
+import numpy as np
+import time
+import logging
+log = logging.getLogger(__name__)
+
+# Scikit Helpers
+from sklearn.model_selection import RandomizedSearchCV, ParameterSampler, ParameterGrid
+from sklearn.utils._param_validation import Interval
+from joblib import effective_n_jobs
+
+
+class BudgetedRandomSearchCV(RandomizedSearchCV):
+    '''Random search that stops sampling once a wall-clock budget is spent.
+    Candidates are drawn like `RandomizedSearchCV` and evaluated in batches of `batch_size`, and no new batch starts
+    when the average batch so far would overrun `budget_s`. Everything else (`cv_results_`, `best_estimator_`, refit)
+    behaves as in `RandomizedSearchCV`, so the results go through `read_write_grid` unchanged.
+
+    :param budget_s: Seconds of search time, refitting the best candidate comes on top.
+    :type budget_s: float
+    :param batch_size: Candidates per batch. Defaults to None, one per parallel job.
+    :type batch_size: int | None
+    '''
+    _parameter_constraints: dict = {
+        **RandomizedSearchCV._parameter_constraints,
+        'budget_s':     [Interval(Real, 0, None, closed = 'neither')],
+        'batch_size':   [Interval(Integral, 1, None, closed = 'left'), None],
+    }
+
+    def __init__(
+            self,
+            estimator,
+            param_distributions,
+            *,
+            budget_s = 600.0,
+            batch_size = None,
+            n_iter = 20,
+            scoring = None,
+            n_jobs = None,
+            refit = True,
+            cv = None,
+            verbose = 0,
+            pre_dispatch = '2*n_jobs',
+            random_state = None,
+            error_score = np.nan,
+            return_train_score = False
+        ):
+        super().__init__(
+            estimator,
+            param_distributions,
+            n_iter = n_iter,
+            scoring = scoring,
+            n_jobs = n_jobs,
+            refit = refit,
+            cv = cv,
+            verbose = verbose,
+            pre_dispatch = pre_dispatch,
+            random_state = random_state,
+            error_score = error_score,
+            return_train_score = return_train_score
+        )
+        self.budget_s = budget_s
+        self.batch_size = batch_size
+
+    def _n_candidates(self) -> int:
+        # Plain lists can be exhausted, sampling more than the grid holds would only warn
+        grids = self.param_distributions if isinstance(self.param_distributions, list) else [self.param_distributions]
+        if all(isinstance(v, (list, tuple, np.ndarray)) for grid in grids for v in grid.values()):
+            return min(self.n_iter, len(ParameterGrid(self.param_distributions)))
+        return self.n_iter
+
+    def _run_search(self, evaluate_candidates):
+        candidates = list(ParameterSampler(self.param_distributions, self._n_candidates(), random_state = self.random_state))
+        batch = self.batch_size or max(1, effective_n_jobs(self.n_jobs))
+        start = time.perf_counter()
+        for i in range(0, len(candidates), batch):
+            evaluate_candidates(candidates[i:i + batch])
+            elapsed = time.perf_counter() - start
+            done = min(i + batch, len(candidates))
+            if done < len(candidates) and elapsed + elapsed / (i // batch + 1) > self.budget_s:
+                log.info('Search budget of %.0fs reached after %d of %d candidates (%.1fs).', self.budget_s, done, len(candidates), elapsed)
+                break
+        return None
@@ -0,0 +1,116 @@
+# Import dependencies
+import numpy as np
+
+# Scikit Helpers
+from sklearn.base import clone
+from sklearn.ensemble import StackingClassifier
+from sklearn.model_selection import check_cv
+from sklearn.preprocessing import LabelEncoder
+from sklearn.utils import Bunch, _safe_indexing
+from sklearn.utils.multiclass import check_classification_targets
+from sklearn.utils.validation import check_is_fitted
+from sklearn.exceptions import NotFittedError
+from joblib import Parallel, delayed
+
+
+def _is_fitted(est) -> bool:
+    try:
+        check_is_fitted(est)
+    except NotFittedError:
+        return False
+    return True
+
+
+def _fit_predict(est, X, y, split, method: str):
+    # split None is a full fit returning the estimator, a (train, test) pair returns the out-of-fold predictions
+    if split is None:
+        return est.fit(X, y)
+    train, test = split
+    est.fit(_safe_indexing(X, train), _safe_indexing(y, train))
+    return getattr(est, method)(_safe_indexing(X, test))
+
+
+class OOFStackingClassifier(StackingClassifier):
+    '''StackingClassifier that reuses base estimators that come in fitted, e.g. the refit `best_estimator_` of a search,
+    instead of fitting them again on the full training set. The out-of-fold predictions the meta-learner trains on come
+    from one shared pool of (estimator, fold) fits rather than one `cross_val_predict` per estimator, and are kept in
+    `oof_` (per base estimator name) once fitted. `cv` must split the rows into a partition, as for `StackingClassifier`.
+    Prediction is unchanged from `StackingClassifier`.
+
+    :param refit_base: Fit clones of the base estimators on the full data even when they come in fitted. Defaults to False.
+    :type refit_base: bool
+    '''
+    _parameter_constraints: dict = {
+        **StackingClassifier._parameter_constraints,
+        'refit_base':   ['boolean'],
+    }
+
+    def __init__(
+            self,
+            estimators,
+            final_estimator = None,
+            *,
+            cv = None,
+            stack_method = 'auto',
+            n_jobs = None,
+            passthrough = False,
+            verbose = 0,
+            refit_base = False
+        ):
+        super().__init__(
+            estimators,
+            final_estimator,
+            cv = cv,
+            stack_method = stack_method,
+            n_jobs = n_jobs,
+            passthrough = passthrough,
+            verbose = verbose
+        )
+        self.refit_base = refit_base
+
+    def fit(self, X, y):
+        check_classification_targets(y)
+        self._label_encoder = LabelEncoder().fit(y)
+        self.classes_ = self._label_encoder.classes_
+        y_encoded = self._label_encoder.transform(y)
+
+        names, all_estimators = self._validate_estimators()
+        self._validate_final_estimator()
+        pairs = [(name, est) for name, est in zip(names, all_estimators) if est != 'drop']
+        self.stack_method_ = [self._method_name(name, est, self.stack_method) for name, est in pairs]
+
+        cv = check_cv(self.cv, y = y, classifier = True)
+        folds = list(cv.split(X, y_encoded))
+        test_idx = np.concatenate([test for _, test in folds])
+        if len(test_idx) != len(y) or len(np.unique(test_idx)) != len(y):
+            raise ValueError('OOFStackingClassifier needs a cv that predicts every row exactly once.')
+
+        # Base estimators see the original labels, as they did in the search that fitted them
+        jobs = []
+        for i, (name, est) in enumerate(pairs):
+            if self.refit_base or not _is_fitted(est):
+                jobs.append((i, None, est))
+            jobs += [(i, fold, est) for fold in folds]
+        results = Parallel(n_jobs = self.n_jobs, verbose = self.verbose)(
+            delayed(_fit_predict)(clone(est), X, y, fold, self.stack_method_[i]) for i, fold, est in jobs
+        )
+
+        self.estimators_ = [est for _, est in pairs]
+        predictions: list[np.ndarray | None] = [None] * len(pairs)
+        for (i, fold, _), out in zip(jobs, results):
+            if fold is None:
+                self.estimators_[i] = out
+                continue
+            if predictions[i] is None:
+                predictions[i] = np.empty((len(y),) + np.shape(out)[1:], dtype = np.asarray(out).dtype)
+            predictions[i][fold[1]] = out
+
+        self.named_estimators_ = Bunch(**{name: est for (name, _), est in zip(pairs, self.estimators_)})
+        for est in self.estimators_:
+            if hasattr(est, 'feature_names_in_'):
+                self.feature_names_in_ = est.feature_names_in_
+        self.oof_ = {name: preds for (name, _), preds in zip(pairs, predictions)}
+
+        X_meta = self._concatenate_predictions(X, predictions)
+        self.final_estimator_.fit(X_meta, y_encoded)
+        return self
@@ -0,0 +1,102 @@
+# import_budget.py
+# Checks import time of the entry-point modules against a budget with `python -X importtime`, exits non-zero on a breach
+
+# Import dependencies
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+import subprocess
+import sys
+import os
+
+# Libraries that only the model pipelines need, none of the light entry points may pull them in
+HEAVY = ('sklearn', 'matplotlib', 'lightgbm', 'mord')
+
+# Module -> (budget in ms, libraries that must not be imported as a side effect)
+BUDGETS: dict[str, tuple[float, tuple[str, ...]]] = {
+    'core':                     (400,  HEAVY + ('sqlalchemy', 'pandas')),
+    'ml_lib':                   (200,  HEAVY),
+    'ETL.runner':               (600,  HEAVY + ('sqlalchemy', 'pandas')),
+    'ETL.transformers.prep':    (1200, HEAVY + ('sqlalchemy',)),
+    'ETL.loaders.predictions':  (1200, HEAVY + ('sqlalchemy',)),
+}
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+# CLI class for namespace linking and linter assistance
+class CLIArgs(Namespace):
+    repeat: int
+    scale: float
+
+
+def import_profile(module: str, watch: tuple[str, ...]) -> tuple[float, list[str]]:
+    '''Imports `module` in a fresh interpreter.
+
+    :returns: Total import time in ms (sum of the top-level cumulative times) and the watched libraries that got imported.
+    :rtype: tuple[float, list[str]]
+    '''
+    code = f'import sys, {module}; print(",".join(m for m in {watch!r} if m in sys.modules))'
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')]))}
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output = True, text = True, cwd = ROOT, env = env)
+    if proc.returncode != 0:
+        raise RuntimeError(f'Importing {module} failed:\n{proc.stderr[-2000:]}')
+
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        # Top-level rows have a single space before the name, nested ones are indented further
+        if cumulative.strip().isdigit() and not name.startswith('  '):
+            total_us += int(cumulative)
+    loaded = [m for m in proc.stdout.strip().split(',') if m]
+    return total_us / 1000, loaded
+
+
+def help_time() -> float:
+    '''Wall time in ms of `run_etl.py --help`, the floor for every CLI invocation.'''
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')]))}
+    code = (
+        'import time, runpy, sys; t = time.perf_counter(); sys.argv = ["run_etl.py", "--help"]\n'
+        'try:\n    runpy.run_path("scripts/run_etl.py", run_name = "__main__")\n'
+        'except SystemExit:\n    pass\n'
+        'print((time.perf_counter() - t) * 1000, file = sys.stderr)'
+    )
+    proc = subprocess.run([sys.executable, '-c', code], capture_output = True, text = True, cwd = ROOT, env = env)
+    return float(proc.stderr.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = ArgumentParser(description = 'Enforce import-time budgets for the ETL entry points.')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'Runs per module, the fastest counts (default: %(default)s)')
+    parser.add_argument('--scale', type = float, default = 1.0, help = 'Multiplier on every budget for slower machines (default: %(default)s)')
+    args = parser.parse_args(namespace = CLIArgs())
+
+    failures = []
+    print(f'{"module":<26} {"ms":>8} {"budget":>8}  heavy imports')
+    for module, (budget, forbidden) in BUDGETS.items():
+        runs = [import_profile(module, forbidden) for _ in range(args.repeat)]
+        ms = min(ms for ms, _ in runs)
+        loaded = runs[0][1]
+        limit = budget * args.scale
+        print(f'{module:<26} {ms:>8.1f} {limit:>8.0f}  {", ".join(loaded) or "-"}')
+        if ms > limit:
+            failures.append(f'{module} imports in {ms:.0f} ms, budget {limit:.0f} ms')
+        if loaded:
+            failures.append(f'{module} pulls in {", ".join(loaded)}')
+
+    ms = min(help_time() for _ in range(args.repeat))
+    limit = BUDGETS['core'][0] * 2 * args.scale
+    print(f'{"run_etl.py --help":<26} {ms:>8.1f} {limit:>8.0f}')
+    if ms > limit:
+        failures.append(f'run_etl.py --help takes {ms:.0f} ms, budget {limit:.0f} ms')
+
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
+
+# EOF
@@ -6,33 +6,33 @@ from argparse import ArgumentParser, Namespace
 from dotenv import load_dotenv
 from pathlib import Path
 import logging
+import json
 
-# Custom libraries
+# Custom libraries, ETL itself is imported once the arguments are parsed so --help stays instant
 from core import log_setup, get_settings, log_exceptions, find_root
-from ETL import TaskRunner
 
 
 # CLI class for namespace linking and linter assistance
 class CLIArgs(Namespace):
-    name: str
+    name: str | None
     config: str
+    force: bool
+    from_stage: str | None
+    profile: bool
+    profile_only: str | None
+    daemon: bool
+    ctl: str | None
+    socket: str | None
 
 @log_exceptions
 def main() -> None:
-    load_dotenv()               # Bring in environment variables first
-    env_cfg = get_settings()    # Initialize settings for the 1st time - saved in lru_cache
-    log_setup(env_cfg)          # Master log setup with Settings obj for lower-level files
-    log = logging.getLogger(__name__)
-
-    # Extra debug log for settings
-    log.info('ETL Top-Level accessed. Configured for environment: %s.' % env_cfg.app_env)
-    log.debug('Key variables parsed include {Storage Path: %s, Database Name: %s}', env_cfg.storage, env_cfg.db_name)
-
     # Create argument parsers
     parser = ArgumentParser(description = 'Run one of the configured ETL pipelines.')
     parser.add_argument(
         'name',
-        help = 'The name of the task (pipeline grouping) or single pipeline to run.'
+        nargs = '?',
+        default = None,
+        help = 'The name of the task (pipeline grouping) or single pipeline to run. Not needed with --daemon.'
     )
     yml_path = find_root() / 'ETL/pipeline.yml'
     parser.add_argument(
@@ -42,8 +42,69 @@ def main() -> None:
         dest = 'config'
     )
 
-    # Grab arguments
+    parser.add_argument(
+        '--force',
+        action = 'store_true',
+        help = 'Ignore checkpoints and re-run every stage of checkpointed pipelines.'
+    )
+    parser.add_argument(
+        '--from-stage',
+        default = None,
+        help = 'Re-run checkpointed stages from this component name onwards, reusing the ones before it.',
+        dest = 'from_stage'
+    )
+
+    parser.add_argument(
+        '--profile',
+        action = 'store_true',
+        help = 'Write cProfile and collapsed-stack output per component under the storage profiles directory. Stages run serially.'
+    )
+    parser.add_argument(
+        '--profile-only',
+        default = None,
+        help = 'Only profile this component name (implies --profile).',
+        dest = 'profile_only'
+    )
+
+    parser.add_argument(
+        '--daemon',
+        action = 'store_true',
+        help = 'Stay up and run tasks from the schedules section of the YAML and from control socket requests.'
+    )
+    parser.add_argument(
+        '--ctl',
+        choices = ['run', 'status', 'stop'],
+        default = None,
+        help = 'Send a command to a running daemon instead of running anything here. run takes the name argument.'
+    )
+    parser.add_argument(
+        '--socket',
+        default = None,
+        help = 'Control socket of the daemon (default: etl.sock in the storage directory)'
+    )
+
+    # Grab arguments, --help and bad arguments exit here before settings or the ETL stack load
     args = parser.parse_args(namespace = CLIArgs())
+    if args.name is None and not args.daemon and args.ctl in (None, 'run'):
+        parser.error('the name of a task or pipeline is required')
+
+    load_dotenv()               # Bring in environment variables first
+    env_cfg = get_settings()    # Initialize settings for the 1st time - saved in lru_cache
+    log_setup(env_cfg)          # Master log setup with Settings obj for lower-level files
+    log = logging.getLogger(__name__)
+
+    # Extra debug log for settings
+    log.info('ETL Top-Level accessed. Configured for environment: %s.' % env_cfg.app_env)
+    log.debug('Key variables parsed include {Storage Path: %s, Database Name: %s}', env_cfg.storage, env_cfg.db_name)
+
+    socket_path = Path(args.socket) if args.socket else env_cfg.storage / 'etl.sock'
+    if args.ctl is not None:
+        from ETL.daemon import send
+        reply = send(socket_path, args.ctl, name = args.name, force = args.force, from_stage = args.from_stage)
+        print(json.dumps(reply, indent = 2))
+        return None
+
+    from ETL import TaskRunner
 
     # Arguments are:
     etl_cfg_path = Path(args.config).resolve()
@@ -55,11 +116,30 @@ def main() -> None:
     # Instantiate the runner
     runner = TaskRunner(etl_cfg_path = str(etl_cfg_path))
 
+    # The daemon keeps this process, its settings and the parsed YAML for every run it makes
+    if args.daemon:
+        from ETL.daemon import EtlDaemon
+        EtlDaemon(runner, socket_path).serve()
+        return None
+
     # Another log for the kickoff
     log.debug('Kicking off pipeline, locating name/task: %s.' % task_or_pipe_name)
 
     # Kick off pipeline
-    runner.run(task_or_pipe_name)
+    try:
+        runner.run(
+            task_or_pipe_name,
+            force = args.force,
+            from_stage = args.from_stage,
+            profile = args.profile,
+            profile_only = args.profile_only
+        )
+    finally:
+        # Per-stage timings, also for a failed run up to the failing stage
+        if runner.report is not None and runner.report.records:
+            summary = runner.report.summary()
+            log.info('Run summary:\n%s', summary)
+            print(summary)
 
     return None
 
@@ -12,10 +12,12 @@ setup(
         'mord~=0.7',
         'pandas~=2.2.3',
         'psycopg2~=2.9.10',
+        'pyarrow~=20.0.0',
         'pydantic~=2.11.4',
         'pydantic-settings~=2.9.1',
         'python-dotenv~=1.1.0',
         'PyYAML~=6.0.2',
+        'requests~=2.32.3',
         'scikit-learn~=1.6.1',
         'SQLAlchemy~=2.0.40',
         'SQLAlchemy-Utils~=0.41.2',
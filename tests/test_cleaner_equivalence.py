@@ -0,0 +1,27 @@
+# Import dependencies
+import pandas as pd
+import pytest
+
+from ETL.transformers.nyc_open import InspectionCleaner
+from scripts.bench_cleaner import synthetic_raw, legacy_transform
+
+
+@pytest.mark.parametrize('seed', [0, 42])
+def test_cleaner_matches_legacy(seed):
+    raw = synthetic_raw(5_000, seed)
+    old = legacy_transform(raw.copy())
+    new = InspectionCleaner().transform(raw.copy())
+
+    # Same columns, rows and dtypes, the column order is free to differ
+    assert sorted(new.columns) == sorted(old.columns)
+    assert len(new) > 0
+    cols = sorted(new.columns)
+    pd.testing.assert_frame_equal(new[cols], old[cols])
+
+
+
+def test_cleaner_passes_empty_frame_through():
+    # An incremental extract with nothing new, with and without the raw columns
+    raw = synthetic_raw(10, 0).iloc[:0]
+    assert InspectionCleaner().transform(raw.copy()).empty
+    assert InspectionCleaner().transform(pd.DataFrame()).empty
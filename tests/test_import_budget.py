@@ -0,0 +1,30 @@
+# Import dependencies
+import pytest
+import os
+
+from scripts.import_budget import BUDGETS, import_profile
+
+# Wall-clock budgets depend on the machine and its load, so they are only asserted when asked for, scaled like `--scale`
+SCALE = os.environ.get('IMPORT_BUDGET_SCALE')
+
+
+@pytest.mark.parametrize('module', list(BUDGETS))
+def test_import_side_effects(module):
+    _, forbidden = BUDGETS[module]
+    _, loaded = import_profile(module, forbidden)
+    assert loaded == [], f'{module} pulls in {", ".join(loaded)}'
+
+
+@pytest.mark.skipif(SCALE is None, reason = 'set IMPORT_BUDGET_SCALE to check import times, or run scripts/import_budget.py')
+@pytest.mark.parametrize('module', list(BUDGETS))
+def test_import_time(module):
+    budget = BUDGETS[module][0] * float(SCALE)
+    # Fastest of a few fresh interpreters, a single cold run is mostly disk cache noise
+    ms = min(import_profile(module, ())[0] for _ in range(3))
+    assert ms <= budget, f'{module} imports in {ms:.0f} ms, budget {budget:.0f} ms'
+
+
+def test_runner_stays_off_the_data_stack():
+    # The CLI and the daemon import the runner before knowing which pipeline runs, none of these may come with it
+    _, loaded = import_profile('ETL.runner', ('pandas', 'sklearn', 'sqlalchemy'))
+    assert loaded == []
@@ -0,0 +1,113 @@
+# Import dependencies
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from collections import Counter
+from threading import Thread, Lock
+import logging
+import json
+import pandas as pd
+import pytest
+
+from ETL.extractors.nyc_open import RawInspectionData
+
+TOTAL = 25
+PAGE_SIZE = 10
+
+
+class _FakeSocrata(BaseHTTPRequestHandler):
+    '''Serves `count(*)` and `$limit`/`$offset` pages of TOTAL synthetic rows, failing the first request for offset 10 with a 503.'''
+    hits: Counter
+    lock: Lock
+
+    def log_message(self, *args) -> None:
+        return None
+
+    def _reply(self, status: int, body: object) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        return None
+
+    def do_GET(self) -> None:
+        query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        if query['$select'].startswith('count(*)'):
+            return self._reply(200, [{'n': str(TOTAL)}])
+
+        offset, limit = int(query['$offset']), int(query['$limit'])
+        with self.lock:
+            self.hits[(offset, limit)] += 1
+            first = self.hits[(offset, limit)] == 1
+        if offset == PAGE_SIZE and first:
+            return self._reply(503, {'message': 'try again'})
+
+        rows = [
+            {'camis': str(i), 'cuisine': 'Pizza', 'inspection_date': f'2024-01-{i % 28 + 1:02d}T00:00:00.000'}
+            for i in range(offset, min(offset + limit, TOTAL))
+        ]
+        return self._reply(200, rows)
+
+
+@pytest.fixture
+def socrata():
+    handler = type('Handler', (_FakeSocrata,), {'hits': Counter(), 'lock': Lock()})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    try:
+        yield f'127.0.0.1:{server.server_port}', handler.hits
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_pages_retry_and_stop(socrata, caplog):
+    domain, hits = socrata
+    extractor = RawInspectionData(
+        domain, 'test-rows', '', years_cutoff = 5, row_limit = 1000,
+        page_size = PAGE_SIZE, max_workers = 2, max_retries = 2, backoff = 0.0, timeout = 5, scheme = 'http'
+    )
+    with caplog.at_level(logging.WARNING, logger = 'ETL.extractors.nyc_open'):
+        chunks = list(extractor.extract_pages())
+
+    # Pages come back in order, the last one short, and every row exactly once
+    assert [len(df) for df in chunks] == [10, 10, 5]
+    assert [int(c) for df in chunks for c in df['camis']] == list(range(TOTAL))
+    assert [list(df.index) for df in chunks] == [list(range(0, 10)), list(range(10, 20)), list(range(20, 25))]
+    assert list(chunks[0].columns) == extractor.columns
+
+    # The 503 page was retried once, nothing past the short last page was requested
+    assert hits == Counter({(0, 10): 1, (10, 10): 2, (20, 5): 1})
+    retries = [r for r in caplog.records if 'retry' in r.getMessage()]
+    assert len(retries) == 1
+    assert extractor.stats['pages'] == 3 and extractor.stats['rows'] == TOTAL
+
+
+def test_pages_are_typed(socrata):
+    domain, _ = socrata
+    extractor = RawInspectionData(
+        domain, 'test-rows', '', years_cutoff = 5, row_limit = 1000,
+        page_size = PAGE_SIZE, max_workers = 2, max_retries = 1, backoff = 0.0, timeout = 5, scheme = 'http'
+    )
+    chunks = list(extractor.extract_pages())
+
+    # Every page is cast like the single request path, columns missing from the rows stay all-null
+    for df in chunks:
+        assert df['camis'].dtype == 'int64'
+        assert df['inspection_date'].dtype == 'datetime64[ns]'
+        assert df['score'].dtype == 'float64' and df['score'].isna().all()
+        assert df['cuisine'].dtype == object
+    assert chunks[0]['inspection_date'].iloc[3] == pd.Timestamp('2024-01-04')
+
+
+def test_gives_up_after_max_retries(socrata):
+    domain, hits = socrata
+    extractor = RawInspectionData(
+        domain, 'test-rows', '', years_cutoff = 5, row_limit = 1000,
+        page_size = PAGE_SIZE, max_workers = 1, max_retries = 0, backoff = 0.0, timeout = 5, scheme = 'http'
+    )
+    with pytest.raises(Exception, match = '503'):
+        list(extractor.extract_pages())
+    assert hits[(10, 10)] == 1
@@ -0,0 +1,58 @@
+# Import dependencies
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import make_scorer, cohen_kappa_score
+from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_lib.scheduler import POOLED_SUPPORTED, pooled_grid_search
+
+
+def _searches() -> dict[str, GridSearchCV]:
+    scorer = make_scorer(cohen_kappa_score, weights = 'quadratic')
+    pipe = Pipeline([('scale', StandardScaler()), ('clf', LogisticRegression(max_iter = 500))])
+    grids = {
+        'logit':    {'clf': [LogisticRegression(max_iter = 500)], 'clf__C': [0.1, 1.0, 10.0]},
+        'tree':     {'clf': [DecisionTreeClassifier(random_state = 0)], 'clf__max_depth': [2, 4]},
+    }
+    return {name: GridSearchCV(pipe, grid, scoring = scorer, cv = TimeSeriesSplit(3)) for name, grid in grids.items()}
+
+
+@pytest.fixture(scope = 'module')
+def data() -> tuple[pd.DataFrame, pd.Series]:
+    X, y = make_classification(n_samples = 400, n_features = 8, n_informative = 5, n_classes = 3, random_state = 0)
+    return pd.DataFrame(X, columns = [f'x{i}' for i in range(8)]), pd.Series(y, name = 'grade')
+
+
+def test_installed_sklearn_is_supported():
+    # setup.py pins the range the pooled path supports, a failure here means the environment drifted off the pin
+    assert POOLED_SUPPORTED
+
+
+@pytest.mark.skipif(not POOLED_SUPPORTED, reason = 'pooled search does not support the installed scikit-learn')
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_pooled_matches_sequential(data, n_jobs):
+    X, y = data
+    pooled = pooled_grid_search(_searches(), X, y, n_jobs = n_jobs, history = {})
+    for name, search in _searches().items():
+        search.fit(X, y)
+        got = pooled[name]
+        for key in ('mean_test_score', 'std_test_score', 'rank_test_score', *(f'split{i}_test_score' for i in range(3))):
+            np.testing.assert_allclose(got.cv_results_[key], search.cv_results_[key], err_msg = f'{name} {key}')
+        assert [repr(p) for p in got.cv_results_['params']] == [repr(p) for p in search.cv_results_['params']]
+        assert got.best_index_ == search.best_index_
+        assert got.best_score_ == pytest.approx(search.best_score_)
+        assert got.n_splits_ == search.n_splits_
+        np.testing.assert_array_equal(got.predict(X), search.predict(X))
+
+
+def test_unsupported_sklearn_refuses(data, monkeypatch):
+    import ml_lib.scheduler as scheduler
+    monkeypatch.setattr(scheduler, 'POOLED_SUPPORTED', False)
+    with pytest.raises(RuntimeError, match = 'scikit-learn'):
+        scheduler.pooled_grid_search(_searches(), *data, history = {})